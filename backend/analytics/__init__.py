@@ -13,10 +13,14 @@ from backend.analytics.telemetry_analysis import (
     TelemetryAnalyzer,
     FlightAnalytics,
     TrendDirection,
+    FlightRingBuffer,
+    telemetry_analyzer,
 )
 
 __all__ = [
     'TelemetryAnalyzer',
     'FlightAnalytics',
     'TrendDirection',
+    'FlightRingBuffer',
+    'telemetry_analyzer',
 ]
@@ -10,9 +10,9 @@ quantitative analysis techniques:
 4. Rate of Change: First derivatives for acceleration analysis
 
 Key design principles:
-- All calculations use NumPy for vectorized performance
-- Designed for streaming data (incremental updates)
-- Memory-efficient sliding window approach
+- Per-aircraft ring buffers hold the window as contiguous NumPy columns
+- Rolling stats are maintained incrementally as samples enter and expire
+- Only rows newer than the buffer are read from the database
 - Configurable window sizes and thresholds
 
 Performance note:
@@ -22,13 +22,18 @@ O(n) memory and O(1) amortized update cost for rolling calculations.
 """
 
 import logging
+import math
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Optional, List, Dict, Tuple
 
 import numpy as np
-from sqlalchemy import select, desc
+from sqlalchemy import bindparam, func, select, update
 
 from backend.models import PositionHistory, FlightState
 from backend.models.base import SessionLocal
@@ -36,6 +41,28 @@ from backend.config import config
 
 logger = logging.getLogger(__name__)
 
+# Metrics summarized by rolling stats, keyed by FlightAnalytics attribute
+_STAT_COLUMNS = {
+    'altitude': PositionHistory.baro_altitude,
+    'speed': PositionHistory.velocity,
+    'vertical_rate': PositionHistory.vertical_rate,
+    'heading': PositionHistory.true_track,
+}
+
+# Vertical rate (m/s) above which a sample is checked for anomalies
+_VRATE_ANOMALY_THRESHOLD = 15.0
+
+# Reason templates for altitude, speed and vertical rate anomalies
+_ANOMALY_REASONS = (
+    'Altitude deviation: {value:.0f}m (z={z:.1f})',
+    'Speed deviation: {value:.0f}m/s (z={z:.1f})',
+    'Vertical rate spike: {value:.1f}m/s (z={z:.1f})',
+)
+
+# Storage dtype for buffered metrics. Altitude, speed, rate and heading
+# need far less than float64 range; accumulators stay in float64.
+_METRIC_DTYPE = np.float32
+
 
 class TrendDirection(str, Enum):
     """Trend direction classification."""
@@ -45,6 +72,15 @@ class TrendDirection(str, Enum):
     UNKNOWN = 'unknown'
 
 
+# Lookup for vectorized trend classification in _compute_trends
+_TRENDS = (
+    TrendDirection.DECREASING,
+    TrendDirection.STABLE,
+    TrendDirection.INCREASING,
+    TrendDirection.UNKNOWN,
+)
+
+
 @dataclass
 class RollingStats:
     """
@@ -107,6 +143,213 @@ class FlightAnalytics:
         )
 
 
+def _load_history_columns(session, stmt):
+    """
+    Execute a history select and return its result as column arrays.
+
+    Expects columns (id, icao24, timestamp, callsign, *_STAT_COLUMNS).
+    Rows come back as plain tuples from a Core select and are transposed
+    once, so no per-row ORM objects or per-row NumPy writes are made.
+    Returns None if there are no rows.
+    """
+    result = session.execute(stmt)
+    ids, icaos, timestamps, callsigns = [], [], [], []
+    metrics = [[] for _ in _STAT_COLUMNS]
+
+    while True:
+        chunk = result.fetchmany(8192)
+        if not chunk:
+            break
+        columns = list(zip(*chunk))
+        ids.extend(columns[0])
+        icaos.extend(columns[1])
+        timestamps.extend(columns[2])
+        callsigns.extend(columns[3])
+        for values, column in zip(metrics, columns[4:]):
+            values.extend(column)
+
+    if not ids:
+        return None
+
+    return (
+        np.array(ids, dtype=np.int64),
+        np.array(icaos),
+        np.array(timestamps, dtype=np.float64),
+        callsigns,
+        {
+            # None becomes NaN on conversion to a float array
+            m: np.array(values, dtype=np.float64)
+            for m, values in zip(_STAT_COLUMNS, metrics)
+        },
+    )
+
+
+class FlightRingBuffer:
+    """
+    Sliding window of recent samples for a single aircraft.
+
+    Stores timestamps (float64) and each metric (float32) in separate
+    contiguous arrays (structure of arrays), so the live window is always
+    a plain slice. Running sums and sums of squares are updated as
+    batches of samples are appended and expired, making mean/std O(1) to
+    read; min/max are single vectorized reductions over the slice.
+
+    Samples must arrive in timestamp order; late samples older than the
+    newest buffered one are skipped.
+    """
+
+    def __init__(self, capacity: int = 64):
+        self._capacity = capacity
+        self._start = 0
+        self._end = 0
+
+        self._timestamps = np.empty(capacity, dtype=np.float64)
+        self._columns = {m: np.empty(capacity, dtype=_METRIC_DTYPE) for m in _STAT_COLUMNS}
+
+        # Running accumulators over finite samples in the window
+        self._sum = dict.fromkeys(_STAT_COLUMNS, 0.0)
+        self._sumsq = dict.fromkeys(_STAT_COLUMNS, 0.0)
+        self._count = dict.fromkeys(_STAT_COLUMNS, 0)
+
+        self.last_id = 0
+        self.callsign: Optional[str] = None
+
+    def __len__(self) -> int:
+        return self._end - self._start
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        """Timestamps of samples in the window (view, ascending)."""
+        return self._timestamps[self._start:self._end]
+
+    def series(self, metric: str) -> np.ndarray:
+        """Values of a metric in the window (view, NaN where missing)."""
+        return self._columns[metric][self._start:self._end]
+
+    @property
+    def oldest_timestamp(self) -> Optional[int]:
+        """Timestamp of the oldest sample in the window, or None if empty."""
+        if self._end == self._start:
+            return None
+        return int(self._timestamps[self._start])
+
+    def latest(self, metric: str) -> Optional[float]:
+        """Most recent value of a metric, or None if the window is empty."""
+        if self._end == self._start:
+            return None
+        value = self._columns[metric][self._end - 1]
+        return None if np.isnan(value) else float(value)
+
+    def extend(
+        self,
+        ids: np.ndarray,
+        timestamps: np.ndarray,
+        callsign: Optional[str],
+        columns: Dict[str, np.ndarray],
+    ) -> None:
+        """
+        Append a batch of samples ordered by ascending row id.
+
+        `columns` maps each metric in _STAT_COLUMNS to its values (NaN
+        where missing). Rows already seen (by id) or older than the newest
+        buffered sample are skipped.
+        """
+        keep = ids > self.last_id
+        if not keep.any():
+            return
+        self.last_id = int(ids[-1])
+        self.callsign = callsign
+
+        # Drop out-of-order samples: each must be >= everything before it
+        floor = self._timestamps[self._end - 1] if self._end > self._start else -np.inf
+        running = np.maximum.accumulate(np.concatenate(([floor], timestamps)))[:-1]
+        keep &= timestamps >= running
+        if not keep.all():
+            timestamps = timestamps[keep]
+            columns = {m: values[keep] for m, values in columns.items()}
+
+        k = len(timestamps)
+        if k == 0:
+            return
+        if self._end + k > self._capacity:
+            self._compact(k)
+
+        dst = slice(self._end, self._end + k)
+        self._timestamps[dst] = timestamps
+        for metric, column in self._columns.items():
+            column[dst] = columns[metric]
+            # Accumulate the stored (rounded) values so expiry subtracts
+            # exactly what was added
+            added = column[dst].astype(np.float64)
+            self._sum[metric] += float(np.nansum(added))
+            self._sumsq[metric] += float(np.nansum(added * added))
+            self._count[metric] += int(np.count_nonzero(~np.isnan(added)))
+
+        self._end += k
+
+    def expire(self, cutoff: float) -> None:
+        """Drop samples with timestamp older than cutoff."""
+        # Timestamps are sorted, so the expired prefix is found by bisection
+        # and subtracted from the accumulators as one slice per metric
+        stop = self._start + int(np.searchsorted(self.timestamps, cutoff, side='left'))
+        if stop > self._start:
+            for metric, column in self._columns.items():
+                expired = column[self._start:stop]
+                expired = expired.astype(np.float64)
+                self._sum[metric] -= float(np.nansum(expired))
+                self._sumsq[metric] -= float(np.nansum(expired * expired))
+                self._count[metric] -= int(np.count_nonzero(~np.isnan(expired)))
+            self._start = stop
+
+    def stats(self, metric: str, min_samples: int) -> Optional[RollingStats]:
+        """Rolling statistics for a metric, or None if too few samples."""
+        n = self._count[metric]
+        if n < min_samples or n == 0:
+            return None
+
+        mean = self._sum[metric] / n
+        # Clamp tiny negative variance caused by floating-point rounding
+        variance = max(self._sumsq[metric] / n - mean * mean, 0.0)
+
+        values = self.series(metric)
+        return RollingStats(
+            mean=mean,
+            std=math.sqrt(variance),
+            min_val=float(np.fmin.reduce(values)),
+            max_val=float(np.fmax.reduce(values)),
+            count=n,
+        )
+
+    def _compact(self, incoming: int) -> None:
+        """
+        Move the live window to the front of the arrays, growing them if
+        the window plus `incoming` samples would be more than half full.
+        Accumulators are recomputed from the live slice to discard drift
+        from repeated add/subtract.
+        """
+        live = self._end - self._start
+        while live + incoming > self._capacity // 2:
+            self._capacity *= 2
+
+        src = slice(self._start, self._end)
+        timestamps = np.empty(self._capacity, dtype=np.float64)
+        timestamps[:live] = self._timestamps[src]
+        self._timestamps = timestamps
+
+        for metric, column in self._columns.items():
+            resized = np.empty(self._capacity, dtype=_METRIC_DTYPE)
+            resized[:live] = column[src]
+            self._columns[metric] = resized
+
+            values = resized[:live].astype(np.float64)
+            self._sum[metric] = float(np.nansum(values))
+            self._sumsq[metric] = float(np.nansum(values * values))
+            self._count[metric] = int(np.count_nonzero(~np.isnan(values)))
+
+        self._start = 0
+        self._end = live
+
+
 class TelemetryAnalyzer:
     """
     Analyzes aircraft telemetry time-series data.
@@ -133,232 +376,301 @@ class TelemetryAnalyzer:
         self.anomaly_z_threshold = anomaly_z_threshold
         self.trend_threshold = trend_threshold
 
-        # Cache for repeated queries
-        self._cache: Dict[str, Tuple[datetime, FlightAnalytics]] = {}
-        self._cache_ttl_seconds = 10
+        # Results keyed by icao24, tagged with the newest and oldest sample
+        # timestamps they were computed from; reused until a newer sample
+        # arrives or the oldest one slides out of the window.
+        # Kept in LRU order and bounded so long uptimes can't grow it.
+        self._cache: OrderedDict[str, Tuple[int, Optional[int], FlightAnalytics]] = OrderedDict()
+        self._cache_max_entries = config.cache.max_entries
+
+        # Sliding window per aircraft, fed incrementally from PositionHistory
+        self._buffers: Dict[str, FlightRingBuffer] = {}
+        self._buffer_capacity = window_seconds // max(config.ingestion.poll_interval, 1) + 16
+        self._lock = threading.RLock()
+
+        # Background worker for fleet updates triggered by ingestion
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='analytics')
+        self._pending_update: Optional[Future] = None
+        # Guards only _pending_update, so submitting never waits behind an
+        # analysis pass holding self._lock
+        self._update_lock = threading.Lock()
 
     def analyze_flight(self, icao24: str) -> Optional[FlightAnalytics]:
         """
         Compute analytics for a single aircraft.
 
-        Fetches recent history from database and computes rolling
-        statistics, trends, and anomaly detection.
+        Pulls any new history rows into the aircraft's ring buffer and
+        reads rolling statistics, trends, and anomalies from the window.
+        A cached result is returned if no sample has arrived since it was
+        computed and none of its samples has left the window.
         """
         icao24 = icao24.lower()
 
-        # Check cache
-        if icao24 in self._cache:
-            cached_time, cached_result = self._cache[icao24]
-            age = (datetime.now(timezone.utc) - cached_time).total_seconds()
-            if age < self._cache_ttl_seconds:
-                return cached_result
-
-        # Fetch historical data
-        history = self._fetch_history(icao24)
-        if not history or len(history) < self.min_samples:
-            logger.debug(f'Insufficient history for {icao24}: {len(history) if history else 0} samples')
-            return None
+        now = time.time()
+        window_start = int(now - self.window_seconds)
+        retention_cutoff = int(now) - config.retention.hours * 3600
+
+        with self._lock:
+            with SessionLocal() as session:
+                total_samples, version = session.execute(
+                    select(func.count(), func.max(PositionHistory.timestamp))
+                    .where(PositionHistory.icao24 == icao24)
+                    .where(PositionHistory.timestamp >= retention_cutoff)
+                ).one()
+
+                if total_samples < self.min_samples:
+                    logger.debug(f'Insufficient history for {icao24}: {total_samples} samples')
+                    return None
 
-        # Convert to NumPy arrays
-        timestamps = np.array([h.timestamp for h in history], dtype=np.float64)
-        altitudes = np.array([h.baro_altitude for h in history], dtype=np.float64)
-        speeds = np.array([h.velocity for h in history], dtype=np.float64)
-        vertical_rates = np.array([h.vertical_rate for h in history], dtype=np.float64)
-        headings = np.array([h.true_track for h in history], dtype=np.float64)
+                # Check cache
+                cached = self._get_cached(icao24, version, window_start)
+                if cached:
+                    return cached
 
-        # Get window of recent data
-        now = datetime.now(timezone.utc).timestamp()
-        window_mask = timestamps >= (now - self.window_seconds)
+                buffer = self._sync_buffer(session, icao24, window_start)
+
+            analytics = self._analyze_buffer(
+                icao24, buffer, total_samples, datetime.now(timezone.utc)
+            )
+
+            # Update cache
+            self._set_cached(icao24, version, buffer.oldest_timestamp, analytics)
+
+        return analytics
+
+    def _get_cached(self, icao24: str, version: int, window_start: int) -> Optional[FlightAnalytics]:
+        """
+        Return cached analytics if computed from the given version and
+        all of the samples they used are still inside the window.
+        """
+        entry = self._cache.get(icao24)
+        if entry is None or entry[0] != version:
+            return None
+        oldest = entry[1]
+        if oldest is not None and oldest < window_start:
+            return None  # Window moved past a sample; stats would be stale
+        self._cache.move_to_end(icao24)
+        return entry[2]
 
-        # Compute analytics
-        callsign = history[-1].callsign if history else None
+    def _set_cached(
+        self,
+        icao24: str,
+        version: int,
+        oldest: Optional[int],
+        analytics: FlightAnalytics,
+    ) -> None:
+        """Store analytics, evicting least recently used entries over the limit."""
+        self._cache[icao24] = (version, oldest, analytics)
+        self._cache.move_to_end(icao24)
+        while len(self._cache) > self._cache_max_entries:
+            self._cache.popitem(last=False)
 
+    def _analyze_buffer(
+        self,
+        icao24: str,
+        buffer: FlightRingBuffer,
+        total_samples: int,
+        computed_at: datetime,
+    ) -> FlightAnalytics:
+        """Build analytics for one aircraft from its up-to-date ring buffer."""
         analytics = FlightAnalytics(
             icao24=icao24,
-            callsign=callsign,
-            computed_at=datetime.now(timezone.utc),
-            total_samples=len(history),
-            window_samples=int(window_mask.sum()),
+            callsign=buffer.callsign,
+            computed_at=computed_at,
+            total_samples=total_samples,
+            window_samples=len(buffer),
         )
 
-        # Compute rolling stats for each metric
-        analytics.altitude = self._compute_rolling_stats(
-            altitudes, window_mask, 'altitude'
-        )
-        analytics.speed = self._compute_rolling_stats(
-            speeds, window_mask, 'speed'
-        )
-        analytics.vertical_rate = self._compute_rolling_stats(
-            vertical_rates, window_mask, 'vertical_rate'
-        )
-        analytics.heading = self._compute_rolling_stats(
-            headings, window_mask, 'heading'
-        )
+        # Rolling stats are maintained by the buffer
+        analytics.altitude = buffer.stats('altitude', self.min_samples)
+        analytics.speed = buffer.stats('speed', self.min_samples)
+        analytics.vertical_rate = buffer.stats('vertical_rate', self.min_samples)
+        analytics.heading = buffer.stats('heading', self.min_samples)
 
         # Compute trends
-        analytics.altitude_trend = self._compute_trend(
-            timestamps[window_mask],
-            altitudes[window_mask],
-        )
-        analytics.speed_trend = self._compute_trend(
-            timestamps[window_mask],
-            speeds[window_mask],
+        analytics.altitude_trend, analytics.speed_trend = self._compute_trends(
+            buffer.timestamps,
+            np.vstack((buffer.series('altitude'), buffer.series('speed'))),
+            (analytics.altitude, analytics.speed),
         )
 
         # Detect anomalies
         self._detect_anomalies(
             analytics,
-            altitudes, speeds, vertical_rates,
-            window_mask,
+            buffer.latest('altitude'),
+            buffer.latest('speed'),
+            buffer.latest('vertical_rate'),
         )
 
-        # Update cache
-        self._cache[icao24] = (datetime.now(timezone.utc), analytics)
-
         return analytics
 
-    def _fetch_history(self, icao24: str) -> List[PositionHistory]:
-        """
-        Fetch position history for an aircraft.
+    def _get_buffer(self, icao24: str) -> FlightRingBuffer:
+        """Return the ring buffer for an aircraft, creating it if needed."""
+        buffer = self._buffers.get(icao24)
+        if buffer is None:
+            buffer = FlightRingBuffer(self._buffer_capacity)
+            self._buffers[icao24] = buffer
+        return buffer
 
-        Returns records from the retention window, ordered by timestamp.
-        """
-        cutoff = int(datetime.now(timezone.utc).timestamp()) - config.retention.hours * 3600
+    def _sync_buffer(self, session, icao24: str, window_start: int) -> FlightRingBuffer:
+        """Bring a single aircraft's ring buffer up to date."""
+        return self._sync_all_buffers(session, [icao24], window_start)[icao24]
 
-        with SessionLocal() as session:
-            stmt = (
-                select(PositionHistory)
-                .where(PositionHistory.icao24 == icao24)
-                .where(PositionHistory.timestamp >= cutoff)
-                .order_by(PositionHistory.timestamp.asc())
-            )
-            result = session.execute(stmt).scalars().all()
-            return list(result)
-
-    def _compute_rolling_stats(
+    def _sync_all_buffers(
         self,
-        values: np.ndarray,
-        window_mask: np.ndarray,
-        metric_name: str,
-    ) -> Optional[RollingStats]:
+        session,
+        icao24s: List[str],
+        window_start: int,
+    ) -> Dict[str, FlightRingBuffer]:
         """
-        Compute rolling statistics for a metric within the window.
-
-        Handles NaN values and insufficient data gracefully.
+        Bring the ring buffers of many aircraft up to date.
+
+        New buffers are filled from the whole window; buffers that have
+        been synced before only fetch rows past the oldest of their sync
+        points (by surrogate id), so a newly seen aircraft doesn't make
+        everyone else re-read the window. Each result is loaded straight
+        into column arrays and every aircraft's segment is appended to
+        its buffer. Expired samples are then dropped.
         """
-        # Apply window mask
-        windowed = values[window_mask]
-
-        # Filter out NaN/None values
-        valid = windowed[~np.isnan(windowed)]
-
-        if len(valid) < self.min_samples:
-            return None
-
-        return RollingStats(
-            mean=float(np.mean(valid)),
-            std=float(np.std(valid)),
-            min_val=float(np.min(valid)),
-            max_val=float(np.max(valid)),
-            count=len(valid),
+        buffers = {icao24: self._get_buffer(icao24) for icao24 in icao24s}
+        fresh = [icao24 for icao24, b in buffers.items() if b.last_id == 0]
+        synced = [icao24 for icao24, b in buffers.items() if b.last_id != 0]
+
+        base = (
+            select(
+                PositionHistory.id,
+                PositionHistory.icao24,
+                PositionHistory.timestamp,
+                PositionHistory.callsign,
+                *_STAT_COLUMNS.values(),
+            )
+            .where(PositionHistory.timestamp >= window_start)
+            .order_by(PositionHistory.id.asc())
         )
+        if fresh:
+            stmt = base.where(PositionHistory.icao24.in_(fresh))
+            self._extend_buffers(buffers, _load_history_columns(session, stmt))
+        if synced:
+            since_id = min(buffers[icao24].last_id for icao24 in synced)
+            stmt = (
+                base.where(PositionHistory.icao24.in_(synced))
+                .where(PositionHistory.id > since_id)
+            )
+            self._extend_buffers(buffers, _load_history_columns(session, stmt))
+
+        for buffer in buffers.values():
+            buffer.expire(window_start)
+        return buffers
+
+    @staticmethod
+    def _extend_buffers(buffers: Dict[str, FlightRingBuffer], batch) -> None:
+        """Append each aircraft's rows from a loaded history batch."""
+        if batch is None:
+            return
+        ids, icaos, timestamps, callsigns, columns = batch
+
+        # Stable sort groups each aircraft's rows while keeping id order
+        order = np.argsort(icaos, kind='stable')
+        icaos = icaos[order]
+        keys, starts = np.unique(icaos, return_index=True)
+        ends = np.append(starts[1:], len(icaos))
+
+        for icao24, start, end in zip(keys.tolist(), starts, ends):
+            rows = order[start:end]
+            buffers[icao24].extend(
+                ids[rows],
+                timestamps[rows],
+                callsigns[rows[-1]],
+                {m: values[rows] for m, values in columns.items()},
+            )
 
-    def _compute_trend(
+    def _compute_trends(
         self,
         timestamps: np.ndarray,
-        values: np.ndarray,
-    ) -> TrendDirection:
+        series: np.ndarray,
+        stats: Tuple[Optional[RollingStats], ...],
+    ) -> List[TrendDirection]:
         """
-        Determine trend direction using linear regression.
+        Determine trend direction for several metrics using linear regression.
 
         Similar to trend line analysis in technical analysis.
-        Returns trend based on slope of best-fit line.
+        `series` has one row per metric sharing the same timestamps; all
+        rows are fitted together so the masking and reductions run once
+        for the whole window rather than once per metric. `stats` holds
+        each row's RollingStats, whose min/max normalize the slope.
         """
-        # Filter out NaN values
-        valid_mask = ~np.isnan(values)
-        t = timestamps[valid_mask]
-        v = values[valid_mask]
-
-        if len(t) < self.min_samples:
-            return TrendDirection.UNKNOWN
-
-        # Normalize timestamps to avoid numerical issues
-        t_normalized = t - t[0]
-
-        # Linear regression: v = slope * t + intercept
-        # Using numpy polyfit for efficiency
-        try:
-            slope, _ = np.polyfit(t_normalized, v, 1)
-        except np.linalg.LinAlgError:
-            return TrendDirection.UNKNOWN
-
-        # Normalize slope by value range for comparison
-        value_range = np.ptp(v)  # peak-to-peak
-        if value_range > 0:
-            normalized_slope = slope / value_range
-        else:
-            normalized_slope = 0
-
-        # Classify trend
-        if normalized_slope > self.trend_threshold:
-            return TrendDirection.INCREASING
-        elif normalized_slope < -self.trend_threshold:
-            return TrendDirection.DECREASING
-        else:
-            return TrendDirection.STABLE
+        valid = ~np.isnan(series)
+        n = valid.sum(axis=1)
+
+        with np.errstate(invalid='ignore', divide='ignore'):
+            # Per-row means over each metric's own valid samples
+            t = np.where(valid, timestamps, 0.0)
+            v = np.where(valid, series, 0.0)
+            t_mean = t.sum(axis=1) / n
+            v_mean = v.sum(axis=1, dtype=np.float64) / n
+
+            # Closed-form OLS slope, cov(t, v) / var(t), on centered data
+            t0 = np.where(valid, timestamps - t_mean[:, None], 0.0)
+            v0 = np.where(valid, series - v_mean[:, None], 0.0)
+            t_var = np.einsum('ij,ij->i', t0, t0)
+            slope = np.einsum('ij,ij->i', t0, v0) / t_var
+
+            # Normalize slope by value range (peak-to-peak) for comparison
+            # Reuses the min/max already in the rolling stats; metrics without
+            # stats have too few samples and come out UNKNOWN below
+            value_range = np.array([st.max_val - st.min_val if st else np.nan for st in stats])
+            normalized = np.where(value_range > 0, slope / value_range, 0.0)
+
+        # Classify without branching: 0/1/2 = decreasing/stable/increasing,
+        # 3 = unknown (too few samples or no time spread)
+        index = (
+            1
+            + (normalized > self.trend_threshold).astype(np.intp)
+            - (normalized < -self.trend_threshold).astype(np.intp)
+        )
+        index[(n < self.min_samples) | (t_var == 0)] = 3
+        return [_TRENDS[i] for i in index.tolist()]
 
     def _detect_anomalies(
         self,
         analytics: FlightAnalytics,
-        altitudes: np.ndarray,
-        speeds: np.ndarray,
-        vertical_rates: np.ndarray,
-        window_mask: np.ndarray,
+        latest_alt: Optional[float],
+        latest_speed: Optional[float],
+        latest_vrate: Optional[float],
     ) -> None:
         """
         Detect anomalies using Z-score method.
 
-        Flags data points that deviate significantly from historical mean.
-        Similar to detecting price spikes in financial data.
+        Flags the most recent observation if it deviates significantly
+        from the window mean. Similar to detecting price spikes in
+        financial data.
         """
-        # Get most recent values
-        latest_alt = altitudes[-1] if len(altitudes) > 0 else np.nan
-        latest_speed = speeds[-1] if len(speeds) > 0 else np.nan
-        latest_vrate = vertical_rates[-1] if len(vertical_rates) > 0 else np.nan
-
-        # Altitude anomaly check
-        if analytics.altitude and not np.isnan(latest_alt):
-            if analytics.altitude.std > 0:
-                z_score = abs(latest_alt - analytics.altitude.mean) / analytics.altitude.std
-                if z_score > self.anomaly_z_threshold:
-                    analytics.is_altitude_anomaly = True
-                    analytics.anomaly_reasons.append(
-                        f'Altitude deviation: {latest_alt:.0f}m (z={z_score:.1f})'
-                    )
+        metrics = (analytics.altitude, analytics.speed, analytics.vertical_rate)
 
-        # Speed anomaly check
-        if analytics.speed and not np.isnan(latest_speed):
-            if analytics.speed.std > 0:
-                z_score = abs(latest_speed - analytics.speed.mean) / analytics.speed.std
-                if z_score > self.anomaly_z_threshold:
-                    analytics.is_speed_anomaly = True
-                    analytics.anomaly_reasons.append(
-                        f'Speed deviation: {latest_speed:.0f}m/s (z={z_score:.1f})'
-                    )
+        # Missing values and metrics without stats never count as anomalies
+        latest = np.array([latest_alt, latest_speed, latest_vrate], dtype=np.float64)
+        means = np.array([m.mean if m else np.nan for m in metrics])
+        stds = np.array([m.std if m else 0.0 for m in metrics])
+
+        with np.errstate(invalid='ignore'):
+            z_scores = np.abs(latest - means) / np.where(stds > 0, stds, 1.0)
+
+            # For vertical rate, only sudden large values are considered;
+            # ~3000 fpm is unusual outside of takeoff/landing
+            gates = np.array([True, True, abs(latest[2]) > _VRATE_ANOMALY_THRESHOLD])
 
-        # Vertical rate anomaly (sudden changes)
-        if analytics.vertical_rate and not np.isnan(latest_vrate):
-            # For vertical rate, we care about sudden large values
-            vrate_threshold = 15.0  # ~3000 fpm - unusual outside of takeoff/landing
-            if abs(latest_vrate) > vrate_threshold:
-                # Check if this is unexpected based on history
-                if analytics.vertical_rate.std > 0:
-                    z_score = abs(latest_vrate - analytics.vertical_rate.mean) / analytics.vertical_rate.std
-                    if z_score > self.anomaly_z_threshold:
-                        analytics.is_vertical_rate_anomaly = True
-                        analytics.anomaly_reasons.append(
-                            f'Vertical rate spike: {latest_vrate:.1f}m/s (z={z_score:.1f})'
-                        )
+            flags = (z_scores > self.anomaly_z_threshold) & (stds > 0) & ~np.isnan(latest) & gates
+
+        (
+            analytics.is_altitude_anomaly,
+            analytics.is_speed_anomaly,
+            analytics.is_vertical_rate_anomaly,
+        ) = flags.tolist()
+
+        for i in np.flatnonzero(flags):
+            analytics.anomaly_reasons.append(
+                _ANOMALY_REASONS[i].format(value=latest[i], z=z_scores[i])
+            )
 
     def analyze_all_active(self) -> Dict[str, FlightAnalytics]:
         """
@@ -371,12 +683,56 @@ class TelemetryAnalyzer:
             stmt = select(FlightState.icao24).where(FlightState.on_ground == False)
             icao24s = session.execute(stmt).scalars().all()
 
+        now = time.time()
+        window_start = int(now - self.window_seconds)
+        retention_cutoff = int(now) - config.retention.hours * 3600
+
         results = {}
-        for icao24 in icao24s:
-            analytics = self.analyze_flight(icao24)
-            if analytics:
+        with self._lock:
+            # Forget buffers for aircraft that are no longer tracked
+            active = set(icao24s)
+            for icao24 in [k for k in self._buffers if k not in active]:
+                del self._buffers[icao24]
+
+            if not icao24s:
+                return results
+
+            with SessionLocal() as session:
+                # Sample counts and versions for the whole fleet in one query
+                totals = {}
+                versions = {}
+                for icao24, count, version in session.execute(
+                    select(
+                        PositionHistory.icao24,
+                        func.count(),
+                        func.max(PositionHistory.timestamp),
+                    )
+                    .where(PositionHistory.icao24.in_(icao24s))
+                    .where(PositionHistory.timestamp >= retention_cutoff)
+                    .group_by(PositionHistory.icao24)
+                ):
+                    if count < self.min_samples:
+                        continue
+                    cached = self._get_cached(icao24, version, window_start)
+                    if cached:
+                        results[icao24] = cached
+                    else:
+                        totals[icao24] = count
+                        versions[icao24] = version
+
+                # Only aircraft with new or expiring samples are recomputed
+                buffers = self._sync_all_buffers(session, list(totals), window_start)
+
+            computed_at = datetime.now(timezone.utc)
+            for icao24, buffer in buffers.items():
+                analytics = self._analyze_buffer(icao24, buffer, totals[icao24], computed_at)
+                self._set_cached(icao24, versions[icao24], buffer.oldest_timestamp, analytics)
                 results[icao24] = analytics
 
+            # Drop cached results for aircraft that are no longer active
+            for icao24 in [k for k in self._cache if k not in active]:
+                del self._cache[icao24]
+
         logger.info(f'Analyzed {len(results)} active flights')
         return results
 
@@ -394,73 +750,137 @@ class TelemetryAnalyzer:
         if not analytics_map:
             return 0
 
-        updated = 0
-        with SessionLocal() as session:
-            for icao24, analytics in analytics_map.items():
-                # Map trend enum to string for storage
-                speed_trend = analytics.speed_trend.value if analytics.speed_trend else None
-                altitude_trend = analytics.altitude_trend.value if analytics.altitude_trend else None
-
-                session.query(FlightState).filter(
-                    FlightState.icao24 == icao24
-                ).update({
-                    'speed_trend': speed_trend,
-                    'altitude_trend': altitude_trend,
-                    'is_anomaly': analytics.has_anomaly,
-                })
-                updated += 1
+        # Map trend enums to strings for storage
+        rows = [
+            {
+                'b_icao24': icao24,
+                'speed_trend': analytics.speed_trend.value if analytics.speed_trend else None,
+                'altitude_trend': analytics.altitude_trend.value if analytics.altitude_trend else None,
+                'is_anomaly': analytics.has_anomaly,
+            }
+            for icao24, analytics in analytics_map.items()
+        ]
+
+        # One executemany UPDATE for the whole fleet. This goes through the
+        # Core table rather than bulk_update_mappings / ORM bulk UPDATE by
+        # primary key: those raise StaleDataError when a row was removed by
+        # stale-data cleanup after analysis, which a plain UPDATE ignores.
+        table = FlightState.__table__
+        stmt = (
+            update(table)
+            .where(table.c.icao24 == bindparam('b_icao24'))
+            .values(
+                speed_trend=bindparam('speed_trend'),
+                altitude_trend=bindparam('altitude_trend'),
+                is_anomaly=bindparam('is_anomaly'),
+            )
+        )
 
+        with SessionLocal() as session:
+            session.execute(stmt, rows)
             session.commit()
 
+        updated = len(rows)
         logger.info(f'Updated {updated} flight states with analytics')
         return updated
 
+    def submit_update(self) -> Optional[Future]:
+        """
+        Run update_flight_states_with_analytics on the background worker.
+
+        Lets the ingestion thread return to polling instead of waiting on
+        the analytics queries and UPDATE. If the previous update is still
+        running, the new request is skipped and None is returned.
+        """
+        with self._update_lock:
+            if self._pending_update is not None and not self._pending_update.done():
+                logger.debug('Analytics update still running, skipping')
+                return None
+            future = self._executor.submit(self.update_flight_states_with_analytics)
+            future.add_done_callback(self._log_update_failure)
+            self._pending_update = future
+            return future
+
+    @staticmethod
+    def _log_update_failure(future: Future) -> None:
+        """Log exceptions raised by a background analytics update."""
+        error = future.exception()
+        if error is not None:
+            logger.error(f'Analytics update failed: {error}')
+
     def get_fleet_statistics(self) -> dict:
         """
         Compute aggregate statistics across all tracked aircraft.
 
         Returns summary metrics for the entire observable fleet.
         """
+        airborne = FlightState.on_ground == False
+
         with SessionLocal() as session:
-            # Get all active flight data
-            stmt = select(FlightState).where(FlightState.on_ground == False)
-            flights = session.execute(stmt).scalars().all()
-
-        if not flights:
-            return {
-                'count': 0,
-                'altitude': None,
-                'speed': None,
-                'by_phase': {},
+            # All scalar aggregates in one pass over the active rows
+            totals = session.execute(
+                select(
+                    func.count(),
+                    func.count(FlightState.baro_altitude),
+                    func.avg(FlightState.baro_altitude),
+                    func.avg(FlightState.baro_altitude * FlightState.baro_altitude),
+                    func.min(FlightState.baro_altitude),
+                    func.max(FlightState.baro_altitude),
+                    func.count(FlightState.velocity),
+                    func.avg(FlightState.velocity),
+                    func.avg(FlightState.velocity * FlightState.velocity),
+                    func.min(FlightState.velocity),
+                    func.max(FlightState.velocity),
+                    func.count().filter(FlightState.is_anomaly == True),
+                ).where(airborne)
+            ).one()
+
+            count = totals[0]
+            if not count:
+                return {
+                    'count': 0,
+                    'altitude': None,
+                    'speed': None,
+                    'by_phase': {},
+                }
+
+            # Count by flight phase
+            phase_counts = {
+                (phase or 'unknown'): n
+                for phase, n in session.execute(
+                    select(FlightState.flight_phase, func.count())
+                    .where(airborne)
+                    .group_by(FlightState.flight_phase)
+                )
             }
 
-        # Extract metrics
-        altitudes = [f.baro_altitude for f in flights if f.baro_altitude is not None]
-        speeds = [f.velocity for f in flights if f.velocity is not None]
-
-        # Count by flight phase
-        phase_counts = {}
-        for f in flights:
-            phase = f.flight_phase or 'unknown'
-            phase_counts[phase] = phase_counts.get(phase, 0) + 1
-
-        # Count anomalies
-        anomaly_count = sum(1 for f in flights if f.is_anomaly)
-
         return {
-            'count': len(flights),
-            'altitude': {
-                'mean': float(np.mean(altitudes)) if altitudes else None,
-                'min': float(np.min(altitudes)) if altitudes else None,
-                'max': float(np.max(altitudes)) if altitudes else None,
-                'std': float(np.std(altitudes)) if altitudes else None,
-            },
-            'speed': {
-                'mean': float(np.mean(speeds)) if speeds else None,
-                'min': float(np.min(speeds)) if speeds else None,
-                'max': float(np.max(speeds)) if speeds else None,
-                'std': float(np.std(speeds)) if speeds else None,
-            },
+            'count': count,
+            'altitude': self._summary_from_aggregates(*totals[1:6]),
+            'speed': self._summary_from_aggregates(*totals[6:11]),
             'by_phase': phase_counts,
-            'anomaly_count': anomaly_count,
+            'anomaly_count': totals[11],
         }
+
+    @staticmethod
+    def _summary_from_aggregates(
+        n: int,
+        mean: Optional[float],
+        mean_sq: Optional[float],
+        min_val: Optional[float],
+        max_val: Optional[float],
+    ) -> dict:
+        """Shape SQL aggregates into a summary dict; std is the population std."""
+        if not n:
+            return {'mean': None, 'min': None, 'max': None, 'std': None}
+        return {
+            'mean': float(mean),
+            'min': float(min_val),
+            'max': float(max_val),
+            # SQLite has no STDDEV_POP; derive it from E[x^2] - E[x]^2
+            'std': math.sqrt(max(mean_sq - mean * mean, 0.0)),
+        }
+
+
+# Singleton instance (ring buffers persist across analysis runs)
+telemetry_analyzer = TelemetryAnalyzer()
@@ -0,0 +1,40 @@
+"""
+Helpers shared by the API blueprints.
+"""
+
+import time
+from datetime import datetime, timezone
+from typing import Tuple
+
+from backend.config import config
+
+# (unix time, ISO string) of the last formatted response timestamp
+_iso_cache: Tuple[float, str] = (0.0, '')
+
+
+def utc_iso_now() -> str:
+    """
+    Current UTC time as an ISO 8601 string, for response timestamps.
+
+    The formatted string is reused for up to one second, so hot polling
+    endpoints format it at most once per second rather than per request.
+    """
+    global _iso_cache
+    now = time.time()
+    cached_at, iso = _iso_cache
+    if now - cached_at >= 1.0:
+        iso = datetime.fromtimestamp(now, timezone.utc).isoformat()
+        _iso_cache = (now, iso)
+    return iso
+
+
+def query_timing(start_time: float) -> dict:
+    """
+    {'query_time_ms': ...} for a handler that started at start_time.
+
+    Only reported in debug mode; production responses omit the key.
+    Unpack into the response dict: {..., **query_timing(start_time)}.
+    """
+    if not config.debug:
+        return {}
+    return {'query_time_ms': round((time.perf_counter() - start_time) * 1000, 2)}
@@ -9,16 +9,23 @@ Provides endpoints for:
 """
 
 import logging
+import math
+import threading
 import time
 from datetime import datetime, timezone
-from typing import Optional
+from types import MappingProxyType
+from typing import Iterator, Optional
 
-from flask import Blueprint, jsonify, request
+import numpy as np
+import orjson
+from flask import Blueprint, Response, jsonify, request, stream_with_context
+from sqlalchemy import func, select
 
+from backend.api.common import query_timing, utc_iso_now
 from backend.cache import flight_cache
 from backend.models import FlightState, PositionHistory
-from backend.models.base import SessionLocal
-from backend.analytics import TelemetryAnalyzer
+from backend.models.base import ScopedSession
+from backend.analytics import telemetry_analyzer
 from backend.services.flight_info import flight_info_service
 
 logger = logging.getLogger(__name__)
@@ -119,20 +126,23 @@ AIRCRAFT_TYPES = {
 }
 
 
-def get_aircraft_full_name(code: str) -> Optional[str]:
-    """Get full aircraft name from IATA/ICAO code."""
-    if not code:
-        return None
-    code = code.upper()
-    return AIRCRAFT_TYPES.get(code)
-
-# Ticker rotation state (tracks which flight to show next)
-_ticker_state = {
-    'index': 0,
-    'last_rotation': 0,
-    'rotation_interval': 8,  # seconds per flight
+# Read-only view for lookups; codes are stored uppercase
+_AIRCRAFT_TYPES = MappingProxyType(AIRCRAFT_TYPES)
+
+
+# FlightColumns array for each descending list_flights sort
+# (missing values count as 0)
+_SORT_COLUMNS = {
+    'altitude': 'altitude_ft',
+    'speed': 'speed_kts',
 }
 
+# Ticker rotation state (tracks which flight to show next). Updated
+# together under the lock so threaded workers never see a torn pair.
+_ticker_index = 0
+_ticker_last_rotation = 0.0
+_ticker_lock = threading.Lock()
+
 
 @flights_bp.route('', methods=['GET'])
 def list_flights():
@@ -144,8 +154,10 @@ def list_flights():
     - limit: int, max results to return (default 100)
     - sort: string, sort field (distance|altitude|speed, default distance)
     - include_routes: boolean, include cached route info (default true)
+    - bbox: string, only flights inside 'west,south,east,north' degrees
+      (Leaflet's LatLngBounds.toBBoxString() format)
 
-    Response includes query timing for latency awareness.
+    Response includes query timing for latency awareness (debug mode only).
     Routes are included only if already cached (no API calls made here).
     """
     start_time = time.perf_counter()
@@ -155,46 +167,55 @@ def list_flights():
     limit = min(int(request.args.get('limit', 100)), 500)
     sort_by = request.args.get('sort', 'distance')
     include_routes = request.args.get('include_routes', 'true').lower() == 'true'
+    bbox = request.args.get('bbox')
 
     # Get flights from cache
-    if airborne_only:
-        flights = flight_cache.get_airborne()
+    columns = flight_cache.get_columns(airborne_only=airborne_only)
+
+    # Restrict to the map viewport before sorting
+    if bbox:
+        try:
+            west, south, east, north = (float(v) for v in bbox.split(','))
+        except ValueError:
+            return jsonify({'error': 'bbox must be west,south,east,north'}), 400
+        columns = columns.in_bbox(south, west, north, east)
+
+    # Sort and apply limit. A stable argsort on the negated keys gives
+    # what sorted(..., reverse=True)[:limit] would, ties included.
+    # Default: sorted by distance (already from cache), so just slice.
+    sort_column = _SORT_COLUMNS.get(sort_by)
+    if sort_column is not None:
+        keys = np.nan_to_num(getattr(columns, sort_column), nan=0.0)
+        order = np.argsort(-keys, kind='stable')[:limit]
+        flights = [columns.flights[i] for i in order]
     else:
-        flights = flight_cache.get_all()
+        flights = columns.flights[:limit]
 
-    # Sort
-    if sort_by == 'altitude':
-        flights.sort(key=lambda x: x.altitude_ft or 0, reverse=True)
-    elif sort_by == 'speed':
-        flights.sort(key=lambda x: x.speed_kts or 0, reverse=True)
-    # Default: sorted by distance (already from cache)
+    # Cached routes for the whole page in one lookup (no API calls)
+    route_map = (
+        flight_info_service.get_cached_routes([f.callsign for f in flights])
+        if include_routes else {}
+    )
 
-    # Apply limit
-    flights = flights[:limit]
-
-    # Convert to dicts and optionally include cached routes
+    # Convert to dicts and include cached routes where available
     flight_dicts = []
     for f in flights:
-        flight_dict = f.to_dict()
-
-        # Add cached route info if available (no API calls)
-        if include_routes:
-            route_info = flight_info_service.get_cached_route(f.callsign)
-            if route_info:
-                flight_dict['route'] = {
-                    'origin': route_info.origin_iata,
-                    'destination': route_info.destination_iata,
-                }
+        flight_dict = f.to_list_dict()
 
-        flight_dicts.append(flight_dict)
+        route_info = route_map.get(f.callsign)
+        if route_info:
+            flight_dict['route'] = {
+                'origin': route_info.origin_iata,
+                'destination': route_info.destination_iata,
+            }
 
-    query_time_ms = (time.perf_counter() - start_time) * 1000
+        flight_dicts.append(flight_dict)
 
-    return jsonify({
+    return _json_response({
         'flights': flight_dicts,
         'count': len(flight_dicts),
-        'timestamp': datetime.now(timezone.utc).isoformat(),
-        'query_time_ms': round(query_time_ms, 2),
+        'timestamp': utc_iso_now(),
+        **query_timing(start_time),
     })
 
 
@@ -217,8 +238,7 @@ def get_flight(icao24: str):
 
         # Add analytics if requested
         if request.args.get('include_analytics', 'false').lower() == 'true':
-            analyzer = TelemetryAnalyzer()
-            analytics = analyzer.analyze_flight(icao24)
+            analytics = telemetry_analyzer.analyze_flight(icao24)
             if analytics:
                 result['analytics_detail'] = {
                     'total_samples': analytics.total_samples,
@@ -239,7 +259,7 @@ def get_flight(icao24: str):
                 'destination': route_info.destination_iata,
                 'destination_icao': route_info.destination_icao,
                 'destination_name': route_info.destination_name,
-                'scheduled_arrival': route_info.scheduled_arrival.isoformat() if route_info.scheduled_arrival else None,
+                'scheduled_arrival': route_info.scheduled_arrival,
                 'status': route_info.status,
             }
             # Use airline name from route if available
@@ -247,53 +267,51 @@ def get_flight(icao24: str):
                 result['airline_name'] = route_info.airline_name
                 result['airline_icao'] = route_info.airline_icao
 
-        query_time_ms = (time.perf_counter() - start_time) * 1000
-        result['query_time_ms'] = round(query_time_ms, 2)
+        result.update(query_timing(start_time))
 
         return jsonify(result)
 
     # Fallback to database
-    with SessionLocal() as session:
-        flight = session.query(FlightState).filter(
-            FlightState.icao24 == icao24
-        ).first()
-
-        if flight:
-            result = {
-                'icao24': flight.icao24,
-                'callsign': flight.display_callsign,
-                'position': {
-                    'latitude': flight.latitude,
-                    'longitude': flight.longitude,
-                },
-                'telemetry': {
-                    'altitude_ft': flight.altitude_ft,
-                    'speed_kts': flight.speed_kts,
-                    'heading': flight.heading_display,
-                    'vertical_rate_fpm': flight.vertical_rate_fpm,
-                },
-            }
+    session = ScopedSession()
+    flight = session.query(FlightState).filter(
+        FlightState.icao24 == icao24
+    ).first()
+
+    if flight:
+        result = {
+            'icao24': flight.icao24,
+            'callsign': flight.display_callsign,
+            'position': {
+                'latitude': flight.latitude,
+                'longitude': flight.longitude,
+            },
+            'telemetry': {
+                'altitude_ft': flight.altitude_ft,
+                'speed_kts': flight.speed_kts,
+                'heading': flight.heading_display,
+                'vertical_rate_fpm': flight.vertical_rate_fpm,
+            },
+        }
 
-            # Add route information (origin/destination airports)
-            route_info = flight_info_service.get_route_info(flight.callsign)
-            if route_info:
-                result['route'] = {
-                    'origin': route_info.origin_iata,
-                    'origin_icao': route_info.origin_icao,
-                    'origin_name': route_info.origin_name,
-                    'destination': route_info.destination_iata,
-                    'destination_icao': route_info.destination_icao,
-                    'destination_name': route_info.destination_name,
-                    'scheduled_arrival': route_info.scheduled_arrival.isoformat() if route_info.scheduled_arrival else None,
-                    'status': route_info.status,
-                }
-                if route_info.airline_name:
-                    result['airline_name'] = route_info.airline_name
-                    result['airline_icao'] = route_info.airline_icao
+        # Add route information (origin/destination airports)
+        route_info = flight_info_service.get_route_info(flight.callsign)
+        if route_info:
+            result['route'] = {
+                'origin': route_info.origin_iata,
+                'origin_icao': route_info.origin_icao,
+                'origin_name': route_info.origin_name,
+                'destination': route_info.destination_iata,
+                'destination_icao': route_info.destination_icao,
+                'destination_name': route_info.destination_name,
+                'scheduled_arrival': route_info.scheduled_arrival,
+                'status': route_info.status,
+            }
+            if route_info.airline_name:
+                result['airline_name'] = route_info.airline_name
+                result['airline_icao'] = route_info.airline_icao
 
-            query_time_ms = (time.perf_counter() - start_time) * 1000
-            result['query_time_ms'] = round(query_time_ms, 2)
-            return jsonify(result)
+        result.update(query_timing(start_time))
+        return jsonify(result)
 
     return jsonify({'error': 'Flight not found'}), 404
 
@@ -314,30 +332,35 @@ def get_ticker_flight():
 
     rotation_interval = int(request.args.get('rotation_interval', 8))
     max_distance = float(request.args.get('max_distance', 150))
-    _ticker_state['rotation_interval'] = rotation_interval
 
     # Get airborne flights within max distance
-    all_flights = flight_cache.get_airborne()
-    flights = [f for f in all_flights if f.distance_km is not None and f.distance_km <= max_distance]
+    airborne = flight_cache.get_columns(airborne_only=True)
+    flights = airborne.subset(airborne.distance_km <= max_distance).flights
 
     if not flights:
-        return jsonify({
+        return _json_response({
             'flight': None,
             'message': 'No aircraft in range',
             'total_count': 0,
         })
 
-    # Check if we should rotate
+    global _ticker_index, _ticker_last_rotation
+
     now = time.time()
-    if now - _ticker_state['last_rotation'] >= rotation_interval:
-        _ticker_state['index'] = (_ticker_state['index'] + 1) % len(flights)
-        _ticker_state['last_rotation'] = now
+    with _ticker_lock:
+        # Check if we should rotate
+        if now - _ticker_last_rotation >= rotation_interval:
+            _ticker_index = (_ticker_index + 1) % len(flights)
+            _ticker_last_rotation = now
 
-    # Handle case where index is out of bounds (flights changed)
-    if _ticker_state['index'] >= len(flights):
-        _ticker_state['index'] = 0
+        # Handle case where index is out of bounds (flights changed)
+        if _ticker_index >= len(flights):
+            _ticker_index = 0
 
-    current_flight = flights[_ticker_state['index']]
+        index = _ticker_index
+        last_rotation = _ticker_last_rotation
+
+    current_flight = flights[index]
 
     # Build response
     flight_data = current_flight.to_ticker_dict()
@@ -352,7 +375,7 @@ def get_ticker_flight():
             'destination': route_info.destination_iata,
             'destination_icao': route_info.destination_icao,
             'destination_name': route_info.destination_name,
-            'scheduled_arrival': route_info.scheduled_arrival.isoformat() if route_info.scheduled_arrival else None,
+            'scheduled_arrival': route_info.scheduled_arrival,
             'status': route_info.status,
         }
         # Use airline name from route if available
@@ -364,7 +387,11 @@ def get_ticker_flight():
         if route_info.aircraft_iata:
             aircraft_code = route_info.aircraft_iata
             flight_data['type'] = aircraft_code
-            flight_data['type_description'] = get_aircraft_full_name(aircraft_code) or aircraft_code
+            flight_data['type_description'] = (
+                _AIRCRAFT_TYPES.get(aircraft_code)
+                or _AIRCRAFT_TYPES.get(aircraft_code.upper())
+                or aircraft_code
+            )
 
     # Calculate estimated arrival if we have destination and telemetry
     if route_info and route_info.destination_iata and current_flight.speed_kts:
@@ -380,17 +407,31 @@ def get_ticker_flight():
             minutes_remaining = (eta - datetime.now(timezone.utc)).total_seconds() / 60
             flight_data['eta_minutes'] = max(0, int(minutes_remaining))
 
-    query_time_ms = (time.perf_counter() - start_time) * 1000
-
-    return jsonify({
+    return _json_response({
         'flight': flight_data,
-        'current_index': _ticker_state['index'],
+        'current_index': index,
         'total_count': len(flights),
-        'next_rotation_in': max(0, rotation_interval - (now - _ticker_state['last_rotation'])),
-        'query_time_ms': round(query_time_ms, 2),
+        'next_rotation_in': max(0, rotation_interval - (now - last_rotation)),
+        **query_timing(start_time),
     })
 
 
+def _json_response(payload: dict) -> Response:
+    """
+    Serialize a hot-path payload straight to a Response.
+
+    The flight list and ticker are polled by every display, so they skip
+    jsonify and the app's JSON provider (no key sorting or fallback
+    hook); their payloads only hold plain values and datetimes, which
+    orjson handles natively.
+    """
+    return Response(orjson.dumps(payload), mimetype='application/json')
+
+
+# m -> ft, m/s -> kts, m/s -> ft/min for the history altitude/speed/vr columns
+_HISTORY_FACTORS = np.array([3.28084, 1.94384, 196.85])
+
+
 @flights_bp.route('/history/<icao24>', methods=['GET'])
 def get_flight_history(icao24: str):
     """
@@ -398,7 +439,8 @@ def get_flight_history(icao24: str):
 
     Query parameters:
     - minutes: how many minutes of history (default 30, max 1440)
-    - limit: max records to return (default 500)
+    - limit: max records to return (default 500); longer windows are
+      evenly downsampled to fit rather than truncated
 
     Returns time-series data suitable for charting.
     """
@@ -408,46 +450,102 @@ def get_flight_history(icao24: str):
     minutes = min(int(request.args.get('minutes', 30)), 1440)
     limit = min(int(request.args.get('limit', 500)), 5000)
 
-    cutoff = int(datetime.now(timezone.utc).timestamp()) - (minutes * 60)
-
-    with SessionLocal() as session:
-        history = session.query(PositionHistory).filter(
-            PositionHistory.icao24 == icao24,
-            PositionHistory.timestamp >= cutoff
-        ).order_by(
-            PositionHistory.timestamp.asc()
-        ).limit(limit).all()
-
-        # Convert to time-series format
-        # IMPORTANT: All arrays must have the same length for frontend alignment
-        data = {
-            'timestamps': [],
-            'altitudes': [],
-            'speeds': [],
-            'vertical_rates': [],
-            'positions': [],
-        }
-
-        for h in history:
-            data['timestamps'].append(h.timestamp)
-            data['altitudes'].append(h.altitude_ft)
-            data['speeds'].append(h.speed_kts)
-            data['vertical_rates'].append(h.vertical_rate_fpm)
-            # Always append position (even if null) to maintain array alignment
-            if h.latitude is not None and h.longitude is not None:
-                data['positions'].append([h.latitude, h.longitude])
-            else:
-                data['positions'].append(None)
-
-    query_time_ms = (time.perf_counter() - start_time) * 1000
+    cutoff = int(time.time()) - (minutes * 60)
+
+    session = ScopedSession()
+    in_window = (
+        PositionHistory.icao24 == icao24,
+        PositionHistory.timestamp >= cutoff,
+    )
+    total = session.execute(
+        select(func.count()).select_from(PositionHistory).where(*in_window)
+    ).scalar()
+
+    # Plain column tuples: no ORM objects are built for up to 5000 rows
+    columns = (
+        PositionHistory.timestamp,
+        PositionHistory.baro_altitude,
+        PositionHistory.velocity,
+        PositionHistory.vertical_rate,
+        PositionHistory.latitude,
+        PositionHistory.longitude,
+    )
+    if total <= limit:
+        stmt = select(*columns).where(*in_window).order_by(PositionHistory.timestamp.asc())
+    else:
+        # Too many points: keep every stride-th one, counted back from the
+        # newest so the latest position is always included
+        stride = math.ceil(total / limit)
+        numbered = select(
+            *columns,
+            func.row_number().over(order_by=PositionHistory.timestamp.desc()).label('rn'),
+        ).where(*in_window).subquery()
+        stmt = select(
+            *(numbered.c[col.key] for col in columns)
+        ).where(
+            (numbered.c.rn - 1) % stride == 0
+        ).order_by(numbered.c.timestamp.asc()).limit(limit)
+    rows = session.execute(stmt).all()
+
+    # One (N, 6) float array for the whole rowset; None becomes NaN,
+    # which orjson writes as null
+    table = np.array(rows, dtype=np.float64).reshape(-1, 6)
+    count = len(table)
+
+    # Same unit conversions as PositionHistory (truncated like int())
+    # IMPORTANT: All arrays must have the same length for frontend alignment
+    # (orjson only serializes C-contiguous arrays, hence order='C')
+    converted = (table[:, 1:4] * _HISTORY_FACTORS).T
+    data = {
+        'timestamps': table[:, 0].astype(np.int64),
+        'altitudes': _whole_numbers(converted[0]),
+        'speeds': _whole_numbers(converted[1]),
+        'vertical_rates': _whole_numbers(converted[2]),
+        # One [lat, lon] pair per sample (null coordinates if unknown)
+        'positions': table[:, 4:6].astype(np.float32, order='C'),
+    }
 
-    return jsonify({
+    envelope = {
         'icao24': icao24,
-        'history': data,
-        'count': len(data['timestamps']),
+        'count': count,
         'minutes': minutes,
-        'query_time_ms': round(query_time_ms, 2),
-    })
+        **query_timing(start_time),
+    }
+    return Response(
+        stream_with_context(_history_chunks(envelope, data)),
+        mimetype='application/json',
+    )
+
+
+def _whole_numbers(values: np.ndarray) -> list:
+    """
+    Truncate to ints for JSON, with None where the value is missing.
+
+    Floats would serialize as e.g. 32887.0; plain ints keep every
+    history value as short as the per-row int() conversion made it.
+    """
+    missing = np.isnan(values)
+    result = np.where(missing, 0.0, values).astype(np.int64).tolist()
+    for i in np.flatnonzero(missing).tolist():
+        result[i] = None
+    return result
+
+
+def _history_chunks(envelope: dict, data: dict) -> Iterator[bytes]:
+    """
+    Yield the history response piece by piece.
+
+    The envelope goes out first, then each array is serialized straight
+    from numpy. The column arrays in data are already fully loaded;
+    streaming only avoids building the joined response body, so at most
+    one column's JSON encoding exists at a time.
+    """
+    yield orjson.dumps(envelope)[:-1] + b',"history":{'
+    for i, (key, values) in enumerate(data.items()):
+        prefix = b',"' if i else b'"'
+        yield prefix + key.encode() + b'":'
+        yield orjson.dumps(values, option=orjson.OPT_SERIALIZE_NUMPY)
+    yield b'}}\n'
 
 
 def _stats_to_dict(stats) -> Optional[dict]:
@@ -9,13 +9,15 @@ Provides endpoints for:
 
 import logging
 import time
-from datetime import datetime, timezone
 
-from flask import Blueprint, jsonify, request, current_app
+from flask import Blueprint, jsonify, request
 
+from backend import runtime
+from backend.api.common import query_timing, utc_iso_now
 from backend.cache import flight_cache
-from backend.analytics import TelemetryAnalyzer
+from backend.analytics import telemetry_analyzer
 from backend.config import config
+from backend.services.geolocation import get_ip_location
 
 logger = logging.getLogger(__name__)
 
@@ -35,19 +37,16 @@ def get_fleet_metrics():
     """
     start_time = time.perf_counter()
 
-    analyzer = TelemetryAnalyzer()
-    stats = analyzer.get_fleet_statistics()
+    stats = telemetry_analyzer.get_fleet_statistics()
 
     # Add cache stats
     cache_stats = flight_cache.stats
 
-    query_time_ms = (time.perf_counter() - start_time) * 1000
-
     return jsonify({
         'fleet': stats,
         'cache': cache_stats,
-        'timestamp': datetime.now(timezone.utc).isoformat(),
-        'query_time_ms': round(query_time_ms, 2),
+        'timestamp': utc_iso_now(),
+        **query_timing(start_time),
     })
 
 
@@ -65,24 +64,21 @@ def get_system_status():
     start_time = time.perf_counter()
 
     # Get pipeline stats if available
-    pipeline = current_app.config.get('INGESTION_PIPELINE')
+    pipeline = runtime.pipeline
     pipeline_stats = pipeline.stats if pipeline else {'running': False}
 
     # Check database connectivity
     db_ok = True
     try:
         from sqlalchemy import text
-        from backend.models.base import SessionLocal
-        with SessionLocal() as session:
-            session.execute(text('SELECT 1'))
+        from backend.models.base import ScopedSession
+        ScopedSession().execute(text('SELECT 1'))
     except Exception as e:
         db_ok = False
         logger.error(f'Database health check failed: {e}')
 
     # Get observer location
-    observer = current_app.config.get('OBSERVER_LOCATION')
-
-    query_time_ms = (time.perf_counter() - start_time) * 1000
+    observer = runtime.observer_location
 
     return jsonify({
         'status': 'healthy' if (db_ok and pipeline_stats.get('running')) else 'degraded',
@@ -101,8 +97,8 @@ def get_system_status():
             'retention_hours': config.retention.hours,
             'opensky_authenticated': config.opensky.is_authenticated,
         },
-        'timestamp': datetime.now(timezone.utc).isoformat(),
-        'query_time_ms': round(query_time_ms, 2),
+        'timestamp': utc_iso_now(),
+        **query_timing(start_time),
     })
 
 
@@ -120,7 +116,7 @@ def observer_location():
     - Calculate distance to each aircraft
     """
     if request.method == 'GET':
-        location = current_app.config.get('OBSERVER_LOCATION')
+        location = runtime.observer_location
         return jsonify({
             'location': {
                 'latitude': location[0] if location else None,
@@ -153,12 +149,9 @@ def observer_location():
     if not (-180 <= lon <= 180):
         return jsonify({'error': 'Longitude must be between -180 and 180'}), 400
 
-    # Update app config and pipeline
-    current_app.config['OBSERVER_LOCATION'] = (lat, lon)
-
-    pipeline = current_app.config.get('INGESTION_PIPELINE')
-    if pipeline:
-        pipeline.set_observer_location(lat, lon)
+    # Update observer and pipeline
+    runtime.set_observer_location(lat, lon)
+    if runtime.pipeline:
         logger.info(f'Observer location updated to ({lat}, {lon})')
 
     return jsonify({
@@ -177,28 +170,23 @@ def auto_detect_location():
     Auto-detect observer location using IP geolocation.
 
     Uses the geocoder library to determine approximate location
-    based on the client's IP address.
+    based on the client's IP address (cached on disk for a day).
     """
     try:
-        import geocoder
-        g = geocoder.ip('me')
+        ip_location = get_ip_location()
 
-        if not g.ok or not g.latlng:
+        if not ip_location:
             return jsonify({
                 'success': False,
                 'error': 'Could not determine location from IP',
             }), 500
 
-        lat, lon = g.latlng
-
-        # Update app config and pipeline
-        current_app.config['OBSERVER_LOCATION'] = (lat, lon)
+        lat, lon = ip_location.latitude, ip_location.longitude
 
-        pipeline = current_app.config.get('INGESTION_PIPELINE')
-        if pipeline:
-            pipeline.set_observer_location(lat, lon)
+        # Update observer and pipeline
+        runtime.set_observer_location(lat, lon)
 
-        logger.info(f'Auto-detected location: ({lat}, {lon}) in {g.city}, {g.country}')
+        logger.info(f'Auto-detected location: ({lat}, {lon}) in {ip_location.city}, {ip_location.country}')
 
         return jsonify({
             'success': True,
@@ -207,9 +195,9 @@ def auto_detect_location():
                 'longitude': lon,
             },
             'details': {
-                'city': g.city,
-                'region': g.state,
-                'country': g.country,
+                'city': ip_location.city,
+                'region': ip_location.region,
+                'country': ip_location.country,
             },
             'message': 'Location auto-detected from IP',
         })
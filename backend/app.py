@@ -35,16 +35,20 @@ import sys
 import threading
 import time
 
-from flask import Flask, send_from_directory
+import orjson
+from flask import Flask, Response, send_from_directory
+from flask.json.provider import DefaultJSONProvider
 from flask_cors import CORS
 
+from backend import runtime
 from backend.config import config
 from backend.models import init_db
-from backend.models.base import SessionLocal
+from backend.models.base import ScopedSession
 from backend.api import flights_bp, metrics_bp
 from backend.cache import flight_cache
 from backend.ingestion import IngestionPipeline
-from backend.analytics import TelemetryAnalyzer
+from backend.analytics import telemetry_analyzer
+from backend.services.geolocation import get_ip_location
 
 # Configure logging
 logging.basicConfig(
@@ -54,6 +58,46 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+# Health check body never changes; build a fresh Response around it per
+# request (Response objects are mutable and not safe to share)
+_HEALTH_BODY = b'{"status":"ok"}\n'
+
+
+class OrjsonProvider(DefaultJSONProvider):
+    """
+    JSON provider backed by orjson.
+
+    Serializes every jsonify() response in native code instead of the
+    stdlib json encoder, which dominates latency on large history
+    payloads. Keys are sorted and output is compact unless in debug mode,
+    as with the default provider; NumPy values serialize as numbers.
+
+    Unlike the default provider, datetimes serialize as ISO 8601
+    ('2024-05-01T12:00:00+00:00') rather than HTTP dates (RFC 822).
+    dumps() only honors indent=; other json.dumps arguments such as
+    default= and sort_keys= are ignored.
+    """
+
+    _options = orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY | orjson.OPT_NON_STR_KEYS
+
+    def _dump_bytes(self, obj, indent: bool = False) -> bytes:
+        option = self._options | (orjson.OPT_INDENT_2 if indent else 0)
+        # Fall back to Flask's default for types orjson doesn't know (Decimal, ...)
+        return orjson.dumps(obj, default=self.default, option=option)
+
+    def dumps(self, obj, **kwargs) -> str:
+        return self._dump_bytes(obj, indent=bool(kwargs.get('indent'))).decode()
+
+    def loads(self, s, **kwargs):
+        return orjson.loads(s)
+
+    def response(self, *args, **kwargs):
+        obj = self._prepare_response_obj(args, kwargs)
+        indent = (self.compact is None and self._app.debug) or self.compact is False
+        return self._app.response_class(
+            self._dump_bytes(obj, indent) + b'\n', mimetype=self.mimetype
+        )
+
 
 def create_app(start_ingestion: bool = True) -> Flask:
     """
@@ -75,9 +119,11 @@ def create_app(start_ingestion: bool = True) -> Flask:
 
     # Configuration
     app.config['SECRET_KEY'] = config.secret_key
+    app.json = OrjsonProvider(app)
 
     # Enable CORS for API endpoints
-    CORS(app, resources={r'/api/*': {'origins': '*'}})
+    # Browsers may cache preflight results for a day
+    CORS(app, resources={r'/api/*': {'origins': '*'}}, max_age=86400)
 
     # Initialize database
     logger.info('Initializing database...')
@@ -87,20 +133,24 @@ def create_app(start_ingestion: bool = True) -> Flask:
     app.register_blueprint(flights_bp)
     app.register_blueprint(metrics_bp)
 
+    @app.teardown_appcontext
+    def remove_session(exc):
+        """Release the request's scoped session and its connection."""
+        ScopedSession.remove()
+
     # Determine observer location
     observer_location = config.user_location
     if not observer_location:
         # Try auto-detection
         try:
-            import geocoder
-            g = geocoder.ip('me')
-            if g.ok and g.latlng:
-                observer_location = tuple(g.latlng)
-                logger.info(f'Auto-detected location: {observer_location} ({g.city}, {g.country})')
+            ip_location = get_ip_location()
+            if ip_location:
+                observer_location = (ip_location.latitude, ip_location.longitude)
+                logger.info(f'Auto-detected location: {observer_location} ({ip_location.city}, {ip_location.country})')
         except Exception as e:
             logger.warning(f'Location auto-detect failed: {e}')
 
-    app.config['OBSERVER_LOCATION'] = observer_location
+    runtime.observer_location = observer_location
 
     # Initialize ingestion pipeline
     if start_ingestion and observer_location:
@@ -109,24 +159,20 @@ def create_app(start_ingestion: bool = True) -> Flask:
         # Register callback to refresh cache after each ingestion
         def on_ingestion_update(count: int):
             flight_cache.refresh_from_database()
-            # Periodically run analytics
+            # Periodically run analytics off the ingestion thread
             if pipeline._fetch_count % 6 == 0:  # Every minute at 10s polling
-                try:
-                    analyzer = TelemetryAnalyzer()
-                    analyzer.update_flight_states_with_analytics()
-                except Exception as e:
-                    logger.error(f'Analytics update failed: {e}')
+                telemetry_analyzer.submit_update()
 
         pipeline.add_update_callback(on_ingestion_update)
 
         # Start background ingestion
         pipeline.start_background()
-        app.config['INGESTION_PIPELINE'] = pipeline
+        runtime.pipeline = pipeline
 
         logger.info(f'Ingestion started for location {observer_location} with radius {config.ingestion.default_radius_km}km')
     elif not observer_location:
         logger.warning('No observer location configured. Set USER_LOCATION in .env or call /api/metrics/location/auto')
-        app.config['INGESTION_PIPELINE'] = None
+        runtime.pipeline = None
 
     # -------------------------------------------------------------------------
     # Frontend routes
@@ -150,7 +196,7 @@ def create_app(start_ingestion: bool = True) -> Flask:
     @app.route('/health')
     def health():
         """Simple health check endpoint."""
-        return {'status': 'ok'}
+        return Response(_HEALTH_BODY, mimetype='application/json')
 
     # -------------------------------------------------------------------------
     # Error handlers
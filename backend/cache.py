@@ -16,6 +16,7 @@ from multiple frontend clients.
 Memory budget: ~500 flights × ~1KB per flight = ~500KB max
 """
 
+import heapq
 import logging
 import threading
 import time
@@ -23,21 +24,38 @@ from dataclasses import dataclass, field
 from datetime import datetime, timezone
 from typing import Optional, Dict, List, Any
 
+import numpy as np
+
 from backend.config import config
 from backend.models import FlightState
 from backend.models.base import SessionLocal
-from backend.ingestion.aircraft_db import AircraftLookup, AIRCRAFT_TYPES
+from backend.ingestion.aircraft_db import AircraftLookup
 
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+def _epoch_ms(value: Optional[datetime]) -> Optional[int]:
+    """Unix milliseconds; naive datetimes are UTC (SQLite drops the tzinfo)."""
+    if value is None:
+        return None
+    if value.tzinfo is None:
+        value = value.replace(tzinfo=timezone.utc)
+    return int(value.timestamp() * 1000)
+
+
+@dataclass(slots=True)
 class CachedFlightState:
     """
     Cached flight state with display-ready fields.
 
     Combines database state with aircraft lookup data
-    and pre-computed display values.
+    and pre-computed display values. Slotted: the to_*_dict() methods
+    read every field for every flight on each list/ticker request.
+
+    Entries are never modified once cached (a refresh replaces them), so
+    each API payload is built on first use and reused until then. The
+    to_*_dict() methods return a shallow copy that callers may add keys
+    to; the nested dicts are shared and must not be modified.
     """
     # Core identification
     icao24: str
@@ -50,17 +68,13 @@ class CachedFlightState:
     latitude: Optional[float]
     longitude: Optional[float]
     distance_km: Optional[float]
-
-    # Telemetry (raw SI units)
-    altitude_m: Optional[float]
-    velocity_mps: Optional[float]
-    heading: Optional[float]
-    vertical_rate_mps: Optional[float]
+    distance_km_display: Optional[float]  # Rounded to 0.1 km for the API
 
     # Telemetry (display units)
     altitude_ft: Optional[int]
     flight_level: Optional[str]
     speed_kts: Optional[int]
+    heading: Optional[float]
     vertical_rate_fpm: Optional[int]
 
     # Status
@@ -72,15 +86,47 @@ class CachedFlightState:
     altitude_trend: Optional[str]
     is_anomaly: bool
 
-    # Timestamps
+    # Timestamps (Unix seconds / milliseconds)
     last_contact: Optional[int]
-    updated_at: datetime
+    updated_at_ms: Optional[int]
 
     # Cache metadata
     cached_at: float = field(default_factory=time.time)
 
+    # Memoized API payloads (see class docstring)
+    _dict: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+    _list_dict: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+    _ticker_dict: Optional[dict] = field(default=None, init=False, repr=False, compare=False)
+
     def to_dict(self) -> dict:
         """Convert to JSON-serializable dict for API responses."""
+        if self._dict is None:
+            self._dict = self._build_dict()
+        return dict(self._dict)
+
+    def to_list_dict(self) -> dict:
+        """
+        Slimmer representation for the flight list endpoint.
+
+        Same shape as to_dict() so the map can reuse it for the selected
+        flight panel, minus the fields it never reads (operator, trends,
+        timestamps).
+        """
+        if self._list_dict is None:
+            self._list_dict = self._build_list_dict()
+        return dict(self._list_dict)
+
+    def to_ticker_dict(self) -> dict:
+        """
+        Minimal representation for ticker display.
+
+        Optimized for the single-flight focus display mode.
+        """
+        if self._ticker_dict is None:
+            self._ticker_dict = self._build_ticker_dict()
+        return dict(self._ticker_dict)
+
+    def _build_dict(self) -> dict:
         return {
             'icao24': self.icao24,
             'callsign': self.callsign,
@@ -90,7 +136,7 @@ class CachedFlightState:
             'position': {
                 'latitude': self.latitude,
                 'longitude': self.longitude,
-                'distance_km': round(self.distance_km, 1) if self.distance_km else None,
+                'distance_km': self.distance_km_display,
             },
             'telemetry': {
                 'altitude_ft': self.altitude_ft,
@@ -110,16 +156,38 @@ class CachedFlightState:
             },
             'timestamps': {
                 'last_contact': self.last_contact,
-                'updated_at': self.updated_at.isoformat() if self.updated_at else None,
+                'updated_at_ms': self.updated_at_ms,
             },
         }
 
-    def to_ticker_dict(self) -> dict:
-        """
-        Minimal representation for ticker display.
+    def _build_list_dict(self) -> dict:
+        return {
+            'icao24': self.icao24,
+            'callsign': self.callsign,
+            'aircraft_type': self.aircraft_type,
+            'aircraft_type_desc': self.aircraft_type_desc,
+            'position': {
+                'latitude': self.latitude,
+                'longitude': self.longitude,
+                'distance_km': self.distance_km_display,
+            },
+            'telemetry': {
+                'altitude_ft': self.altitude_ft,
+                'flight_level': self.flight_level,
+                'speed_kts': self.speed_kts,
+                'heading': self.heading,
+                'vertical_rate_fpm': self.vertical_rate_fpm,
+            },
+            'status': {
+                'on_ground': self.on_ground,
+                'flight_phase': self.flight_phase,
+            },
+            'analytics': {
+                'is_anomaly': self.is_anomaly,
+            },
+        }
 
-        Optimized for the single-flight focus display mode.
-        """
+    def _build_ticker_dict(self) -> dict:
         return {
             'icao24': self.icao24,
             'callsign': self.callsign,
@@ -132,17 +200,117 @@ class CachedFlightState:
             'heading': self.heading,
             'vertical_rate_fpm': self.vertical_rate_fpm,
             'flight_phase': self.flight_phase,
-            'distance_km': round(self.distance_km, 1) if self.distance_km else None,
+            'distance_km': self.distance_km_display,
             'is_anomaly': self.is_anomaly,
         }
 
 
+@dataclass(frozen=True)
+class FlightColumns:
+    """
+    Column-oriented snapshot of cached flights, sorted by distance.
+
+    Row i of every array describes flights[i]; missing numbers are NaN.
+    Lets endpoints filter and sort in numpy instead of looping over
+    CachedFlightState objects. Snapshots are shared between callers and
+    must be treated as read-only.
+    """
+    flights: List[CachedFlightState]
+    latitude: np.ndarray
+    longitude: np.ndarray
+    distance_km: np.ndarray
+    altitude_ft: np.ndarray
+    speed_kts: np.ndarray
+    on_ground: np.ndarray
+
+    @classmethod
+    def from_flights(cls, flights: List[CachedFlightState]) -> 'FlightColumns':
+        """Build a snapshot, closest first (unknown or zero distance last)."""
+        distance = np.array([f.distance_km for f in flights], dtype=np.float64)
+        sort_key = np.where(distance > 0, distance, np.inf)  # NaN > 0 is False
+        order = np.argsort(sort_key, kind='stable')
+        return cls(
+            flights=[flights[i] for i in order],
+            latitude=np.array([flights[i].latitude for i in order], dtype=np.float64),
+            longitude=np.array([flights[i].longitude for i in order], dtype=np.float64),
+            distance_km=distance[order],
+            altitude_ft=np.array([flights[i].altitude_ft for i in order], dtype=np.float64),
+            speed_kts=np.array([flights[i].speed_kts for i in order], dtype=np.float64),
+            on_ground=np.array([flights[i].on_ground for i in order], dtype=bool),
+        )
+
+    def __len__(self) -> int:
+        return len(self.flights)
+
+    def subset(self, mask: np.ndarray) -> 'FlightColumns':
+        """Rows where mask is true, in the same order."""
+        return FlightColumns(
+            flights=[self.flights[i] for i in np.flatnonzero(mask)],
+            latitude=self.latitude[mask],
+            longitude=self.longitude[mask],
+            distance_km=self.distance_km[mask],
+            altitude_ft=self.altitude_ft[mask],
+            speed_kts=self.speed_kts[mask],
+            on_ground=self.on_ground[mask],
+        )
+
+    def in_bbox(
+        self,
+        min_lat: float,
+        min_lon: float,
+        max_lat: float,
+        max_lon: float,
+    ) -> 'FlightColumns':
+        """
+        Rows positioned inside a lat/lon box, in the same order.
+
+        A box with min_lon > max_lon crosses the antimeridian. Flights
+        without a position are excluded.
+        """
+        lat, lon = self.latitude, self.longitude
+        mask = (lat >= min_lat) & (lat <= max_lat)
+        if min_lon <= max_lon:
+            mask &= (lon >= min_lon) & (lon <= max_lon)
+        else:
+            mask &= (lon >= min_lon) | (lon <= max_lon)
+        return self.subset(mask)
+
+
+class _CacheSnapshot:
+    """
+    One immutable generation of the cache contents.
+
+    Writers build a new snapshot and swap the reference (atomic in
+    CPython), so readers use whichever snapshot they grabbed without
+    locking. Column views are built on first use; readers racing to
+    build them produce identical results, so that needs no lock either.
+    """
+    __slots__ = ('by_icao', '_columns', '_airborne_columns')
+
+    def __init__(self, by_icao: Dict[str, CachedFlightState]):
+        self.by_icao = by_icao
+        self._columns: Optional[FlightColumns] = None
+        self._airborne_columns: Optional[FlightColumns] = None
+
+    def columns(self, airborne_only: bool = False) -> FlightColumns:
+        columns = self._columns
+        if columns is None:
+            columns = self._columns = FlightColumns.from_flights(list(self.by_icao.values()))
+        if not airborne_only:
+            return columns
+        airborne = self._airborne_columns
+        if airborne is None:
+            airborne = self._airborne_columns = columns.subset(~columns.on_ground)
+        return airborne
+
+
 class FlightCache:
     """
     Thread-safe in-memory cache for flight states.
 
     Provides fast read access to current flight data with
-    automatic refresh from database.
+    automatic refresh from database. Reads are lock-free against a
+    copy-on-write snapshot; only writers take the lock.
     """
 
     def __init__(
@@ -153,14 +321,14 @@ class FlightCache:
         self.ttl_seconds = ttl_seconds or config.cache.ttl_seconds
         self.max_entries = max_entries or config.cache.max_entries
 
-        self._cache: Dict[str, CachedFlightState] = {}
-        self._lock = threading.RLock()
+        self._snapshot = _CacheSnapshot({})
+        self._write_lock = threading.Lock()  # Serializes writers only
         self._last_refresh: float = 0
 
         # Aircraft lookup for type enrichment
         self._aircraft_lookup = AircraftLookup()
 
-        # Statistics
+        # Statistics (unlocked, so approximate under concurrent reads)
         self._hits = 0
         self._misses = 0
 
@@ -170,18 +338,16 @@ class FlightCache:
 
         Returns None if not cached or expired.
         """
-        icao24 = icao24.lower()
+        # Callers usually pass the normalized form; skip the copy then
+        if not icao24.islower():
+            icao24 = icao24.lower()
 
-        with self._lock:
-            if icao24 in self._cache:
-                entry = self._cache[icao24]
-                age = time.time() - entry.cached_at
-                if age < self.ttl_seconds:
-                    self._hits += 1
-                    return entry
-                else:
-                    # Expired
-                    del self._cache[icao24]
+        entry = self._snapshot.by_icao.get(icao24)
+        # Expired entries stay in the snapshot (the next refresh replaces
+        # them) so get_all() doesn't lose flights between refreshes
+        if entry is not None and time.time() - entry.cached_at < self.ttl_seconds:
+            self._hits += 1
+            return entry
 
         self._misses += 1
         return None
@@ -195,17 +361,20 @@ class FlightCache:
         replaces the entire cache atomically. This prevents flicker
         between ingestion cycles.
         """
-        with self._lock:
-            result = list(self._cache.values())
-
-        # Sort by distance
-        result.sort(key=lambda x: x.distance_km if x.distance_km else float('inf'))
-
-        return result
+        return list(self.get_columns().flights)
 
     def get_airborne(self) -> List[CachedFlightState]:
         """Get only airborne (not on ground) flights."""
-        return [f for f in self.get_all() if not f.on_ground]
+        return list(self.get_columns(airborne_only=True).flights)
+
+    def get_columns(self, airborne_only: bool = False) -> FlightColumns:
+        """
+        Get a column snapshot of the cache, sorted like get_all().
+
+        The snapshot is shared between callers until the cache changes,
+        so it must not be modified.
+        """
+        return self._snapshot.columns(airborne_only)
 
     def refresh_from_database(self) -> int:
         """
@@ -219,13 +388,21 @@ class FlightCache:
         with SessionLocal() as session:
             flights = session.query(FlightState).all()
 
+        # Warm the aircraft lookup with one query for any new aircraft
+        self._aircraft_lookup.get_many((f.icao24, f.callsign) for f in flights)
+
         new_cache = {}
         for flight in flights:
             cached = self._enrich_flight(flight)
             new_cache[flight.icao24] = cached
 
-        with self._lock:
-            self._cache = new_cache
+        # Sort and build the column views here, on the ingestion thread,
+        # so the first request after a refresh doesn't pay for them
+        snapshot = _CacheSnapshot(new_cache)
+        snapshot.columns(airborne_only=True)
+
+        with self._write_lock:
+            self._snapshot = snapshot
             self._last_refresh = time.time()
 
         logger.debug(f'Cache refreshed with {len(new_cache)} flights')
@@ -243,30 +420,24 @@ class FlightCache:
             flight.callsign
         )
 
-        # Get type description
-        type_desc = None
-        if aircraft_info.type_code:
-            type_desc = AIRCRAFT_TYPES.get(aircraft_info.type_code)
-
         return CachedFlightState(
             icao24=flight.icao24,
             callsign=flight.display_callsign,
             aircraft_type=aircraft_info.type_code,
-            aircraft_type_desc=type_desc,
+            aircraft_type_desc=aircraft_info.type_name,
             operator=aircraft_info.operator_icao or aircraft_info.operator,
 
             latitude=flight.latitude,
             longitude=flight.longitude,
             distance_km=flight.distance_km,
-
-            altitude_m=flight.baro_altitude,
-            velocity_mps=flight.velocity,
-            heading=flight.heading_display,
-            vertical_rate_mps=flight.vertical_rate,
+            distance_km_display=(
+                round(flight.distance_km, 1) if flight.distance_km is not None else None
+            ),
 
             altitude_ft=flight.altitude_ft,
             flight_level=flight.flight_level,
             speed_kts=flight.speed_kts,
+            heading=flight.heading_display,
             vertical_rate_fpm=flight.vertical_rate_fpm,
 
             on_ground=flight.on_ground,
@@ -277,53 +448,61 @@ class FlightCache:
             is_anomaly=flight.is_anomaly,
 
             last_contact=flight.last_contact,
-            updated_at=flight.updated_at,
+            updated_at_ms=_epoch_ms(flight.updated_at),
         )
 
     def update(self, flight: FlightState) -> None:
         """Update cache with a single flight state."""
         cached = self._enrich_flight(flight)
 
-        with self._lock:
-            self._cache[flight.icao24] = cached
+        with self._write_lock:
+            by_icao = dict(self._snapshot.by_icao)
+            by_icao[flight.icao24] = cached
 
             # Evict if over capacity
-            if len(self._cache) > self.max_entries:
-                self._evict_oldest()
+            if len(by_icao) > self.max_entries:
+                self._evict_oldest(by_icao)
+
+            self._snapshot = _CacheSnapshot(by_icao)
 
-    def _evict_oldest(self) -> None:
+    @staticmethod
+    def _evict_oldest(by_icao: Dict[str, CachedFlightState]) -> None:
         """Remove oldest entries when over capacity."""
-        entries = sorted(
-            self._cache.items(),
+        # Remove oldest 10% (partial selection, no full sort)
+        to_remove = max(1, len(by_icao) // 10)
+        oldest = heapq.nsmallest(
+            to_remove,
+            by_icao.items(),
             key=lambda x: x[1].cached_at
         )
-        # Remove oldest 10%
-        to_remove = max(1, len(entries) // 10)
-        for icao24, _ in entries[:to_remove]:
-            del self._cache[icao24]
+        for icao24, _ in oldest:
+            del by_icao[icao24]
 
     def invalidate(self, icao24: str) -> None:
         """Remove specific entry from cache."""
         icao24 = icao24.lower()
-        with self._lock:
-            self._cache.pop(icao24, None)
+        with self._write_lock:
+            if icao24 in self._snapshot.by_icao:
+                by_icao = dict(self._snapshot.by_icao)
+                del by_icao[icao24]
+                self._snapshot = _CacheSnapshot(by_icao)
 
     def clear(self) -> None:
         """Clear entire cache."""
-        with self._lock:
-            self._cache.clear()
+        with self._write_lock:
+            self._snapshot = _CacheSnapshot({})
 
     @property
     def stats(self) -> dict:
         """Get cache statistics."""
-        with self._lock:
-            return {
-                'entries': len(self._cache),
-                'hits': self._hits,
-                'misses': self._misses,
-                'hit_rate': self._hits / (self._hits + self._misses) if (self._hits + self._misses) > 0 else 0,
-                'last_refresh': self._last_refresh,
-            }
+        hits, misses = self._hits, self._misses
+        return {
+            'entries': len(self._snapshot.by_icao),
+            'hits': hits,
+            'misses': misses,
+            'hit_rate': hits / (hits + misses) if (hits + misses) > 0 else 0,
+            'last_refresh': self._last_refresh,
+        }
 
 
 # Singleton instance
@@ -7,7 +7,9 @@ throughout the codebase.
 """
 
 import os
+import re
 from dataclasses import dataclass
+from functools import lru_cache
 from typing import Optional, Tuple
 
 from dotenv import load_dotenv
@@ -15,15 +17,18 @@ from dotenv import load_dotenv
 load_dotenv()
 
 
+# 'lat,lon' with optional whitespace, e.g. '43.68, -79.63'
+_LOCATION_RE = re.compile(
+    r'^\s*([+-]?(?:\d+(?:\.\d*)?|\.\d+))\s*,\s*([+-]?(?:\d+(?:\.\d*)?|\.\d+))\s*$'
+)
+
+
 def _parse_location(value: str) -> Optional[Tuple[float, float]]:
     """Parse 'lat,lon' string into tuple, or None if empty/invalid."""
-    if not value:
-        return None
-    try:
-        lat, lon = value.split(',')
-        return (float(lat.strip()), float(lon.strip()))
-    except (ValueError, AttributeError):
+    match = _LOCATION_RE.match(value) if value else None
+    if not match:
         return None
+    return (float(match.group(1)), float(match.group(2)))
 
 
 @dataclass(frozen=True)
@@ -106,8 +111,15 @@ class AppConfig:
     debug: bool
 
 
+@lru_cache(maxsize=1)
 def load_config() -> AppConfig:
-    """Load and validate all configuration."""
+    """
+    Load and validate all configuration.
+
+    Built once per process; later calls return the same instance as the
+    config singleton. Section defaults are read from the environment
+    when this module is imported.
+    """
     return AppConfig(
         opensky=OpenSkyConfig(),
         database=DatabaseConfig(),
@@ -16,9 +16,10 @@ Usage:
 
 import csv
 import logging
+from collections import OrderedDict
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Optional, Dict
+from typing import Optional, Dict, FrozenSet, Iterable, Tuple
 
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
@@ -28,9 +29,9 @@ from backend.models.base import SessionLocal
 logger = logging.getLogger(__name__)
 
 
-@dataclass
+@dataclass(slots=True)
 class AircraftInfo:
-    """Aircraft information from lookup."""
+    """Aircraft information from lookup (up to cache_size are kept)."""
     icao24: str
     registration: Optional[str] = None
     type_code: Optional[str] = None
@@ -38,6 +39,7 @@ class AircraftInfo:
     operator: Optional[str] = None
     operator_icao: Optional[str] = None
     operator_callsign: Optional[str] = None
+    type_name: Optional[str] = None  # AIRCRAFT_TYPES name for type_code
 
 
 # Common airline ICAO codes and callsigns for display enrichment
@@ -161,6 +163,21 @@ AIRCRAFT_TYPES: Dict[str, str] = {
 }
 
 
+def _group_codes_by_length(codes) -> Tuple[Tuple[int, FrozenSet[str]], ...]:
+    """Bucket codes by length, 3-letter bucket first, then ascending."""
+    buckets: Dict[int, set] = {}
+    for code in codes:
+        buckets.setdefault(len(code), set()).add(code)
+    return tuple(
+        (length, frozenset(buckets[length]))
+        for length in sorted(buckets, key=lambda n: (n != 3, n))
+    )
+
+
+# Airline codes by length, so prefix matching never scans AIRLINE_INFO
+_AIRLINE_CODES_BY_LENGTH = _group_codes_by_length(AIRLINE_INFO)
+
+
 def extract_airline_from_callsign(callsign: Optional[str]) -> Optional[str]:
     """
     Extract airline ICAO code from callsign.
@@ -171,17 +188,14 @@ def extract_airline_from_callsign(callsign: Optional[str]) -> Optional[str]:
     if not callsign or len(callsign) < 3:
         return None
 
-    # Extract first 3 characters as potential airline code
-    prefix = callsign[:3].upper()
+    callsign = callsign.upper()
 
-    # Check if it's a known airline
-    if prefix in AIRLINE_INFO:
-        return prefix
-
-    # Try to find by matching beginning (some callsigns use 2 letters)
-    for code in AIRLINE_INFO:
-        if callsign.upper().startswith(code):
-            return code
+    # One set probe per known code length, standard 3-letter codes first
+    # (some callsigns use 2 letters)
+    for length, codes in _AIRLINE_CODES_BY_LENGTH:
+        prefix = callsign[:length]
+        if prefix in codes:
+            return prefix
 
     return None
 
@@ -195,7 +209,8 @@ class AircraftLookup:
     """
 
     def __init__(self, cache_size: int = 1000):
-        self._cache: Dict[str, AircraftInfo] = {}
+        # LRU order: most recently used entries at the end
+        self._cache: OrderedDict[str, AircraftInfo] = OrderedDict()
         self._cache_size = cache_size
 
     def get(self, icao24: str, callsign: Optional[str] = None) -> AircraftInfo:
@@ -205,10 +220,13 @@ class AircraftLookup:
         Returns AircraftInfo with whatever data is available.
         Enriches with airline info if callsign provided.
         """
-        icao24 = icao24.lower()
+        # Ingestion already lowercases icao24; skip the copy then
+        if not icao24.islower():
+            icao24 = icao24.lower()
 
         # Check cache
         if icao24 in self._cache:
+            self._cache.move_to_end(icao24)
             return self._cache[icao24]
 
         # Query database
@@ -216,41 +234,91 @@ class AircraftLookup:
             aircraft = session.query(Aircraft).filter(
                 Aircraft.icao24 == icao24
             ).first()
+            info = self._build_info(icao24, aircraft, callsign)
+
+        self._store(icao24, info)
+        return info
 
-            if aircraft:
-                info = AircraftInfo(
-                    icao24=icao24,
-                    registration=aircraft.registration,
-                    type_code=aircraft.type_code,
-                    type_description=aircraft.type_description,
-                    operator=aircraft.operator,
-                    operator_icao=aircraft.operator_icao,
-                    operator_callsign=aircraft.operator_callsign,
-                )
+    def get_many(
+        self,
+        flights: Iterable[Tuple[str, Optional[str]]],
+    ) -> Dict[str, AircraftInfo]:
+        """
+        Look up many aircraft at once from (icao24, callsign) pairs.
+
+        Cache misses are loaded with a single IN query rather than one
+        query each; results are cached just like get().
+
+        Returns dict of lowercase icao24 -> AircraftInfo.
+        """
+        result: Dict[str, AircraftInfo] = {}
+        missing: Dict[str, Optional[str]] = {}
+        for icao24, callsign in flights:
+            if not icao24.islower():
+                icao24 = icao24.lower()
+            info = self._cache.get(icao24)
+            if info is not None:
+                self._cache.move_to_end(icao24)
+                result[icao24] = info
             else:
-                # Create minimal info
-                info = AircraftInfo(icao24=icao24)
+                missing[icao24] = callsign
+
+        if not missing:
+            return result
+
+        with SessionLocal() as session:
+            rows = session.query(Aircraft).filter(
+                Aircraft.icao24.in_(list(missing))
+            ).all()
+            by_icao = {aircraft.icao24: aircraft for aircraft in rows}
+            for icao24, callsign in missing.items():
+                info = self._build_info(icao24, by_icao.get(icao24), callsign)
+                self._store(icao24, info)
+                result[icao24] = info
+
+        return result
+
+    @staticmethod
+    def _build_info(
+        icao24: str,
+        aircraft: Optional[Aircraft],
+        callsign: Optional[str],
+    ) -> AircraftInfo:
+        """Build AircraftInfo from a database row (if any) and callsign."""
+        if aircraft:
+            info = AircraftInfo(
+                icao24=icao24,
+                registration=aircraft.registration,
+                type_code=aircraft.type_code,
+                type_description=aircraft.type_description,
+                operator=aircraft.operator,
+                operator_icao=aircraft.operator_icao,
+                operator_callsign=aircraft.operator_callsign,
+            )
+        else:
+            # Create minimal info
+            info = AircraftInfo(icao24=icao24)
+
+        # Resolve the display name once; cache hits reuse it
+        if info.type_code:
+            info.type_name = AIRCRAFT_TYPES.get(info.type_code)
 
         # Enrich with airline info from callsign if available
+        # (extract_airline_from_callsign only returns known codes)
         if callsign and not info.operator_icao:
             airline_code = extract_airline_from_callsign(callsign)
-            if airline_code and airline_code in AIRLINE_INFO:
-                airline = AIRLINE_INFO[airline_code]
-                info.operator_icao = airline[0]
-                info.operator_callsign = airline[1]
-                info.operator = airline[2]
-
-        # Update cache
-        if len(self._cache) >= self._cache_size:
-            # Simple cache eviction: clear oldest half
-            keys = list(self._cache.keys())
-            for key in keys[:len(keys) // 2]:
-                del self._cache[key]
-
-        self._cache[icao24] = info
+            if airline_code:
+                info.operator_icao, info.operator_callsign, info.operator = AIRLINE_INFO[airline_code]
 
         return info
 
+    def _store(self, icao24: str, info: AircraftInfo) -> None:
+        """Add an entry to the lookup cache, evicting least recently used."""
+        self._cache[icao24] = info
+        self._cache.move_to_end(icao24)
+        while len(self._cache) > self._cache_size:
+            self._cache.popitem(last=False)
+
     def get_type_description(self, type_code: str) -> Optional[str]:
         """Get human-readable aircraft type description."""
         return AIRCRAFT_TYPES.get(type_code.upper())
@@ -260,6 +328,18 @@ class AircraftLookup:
         self._cache.clear()
 
 
+# CSV columns read by load_aircraft_csv
+_CSV_COLUMNS = (
+    'icao24',
+    'registration',
+    'typecode',
+    'model',
+    'operator',
+    'operatoricao',
+    'operatorcallsign',
+)
+
+
 def load_aircraft_csv(csv_path: Path, batch_size: int = 5000) -> int:
     """
     Load aircraft data from CSV into database.
@@ -281,21 +361,46 @@ def load_aircraft_csv(csv_path: Path, batch_size: int = 5000) -> int:
     batch = []
 
     with open(csv_path, 'r', encoding='utf-8', errors='ignore') as f:
-        reader = csv.DictReader(f)
+        # Positional rows: only 7 of ~27 columns are used, so skip
+        # building a dict per row
+        reader = csv.reader(f)
+        header = next(reader, [])
+        if 'icao24' not in header:
+            logger.error(f'Aircraft CSV has no icao24 column: {csv_path}')
+            return 0
+
+        # Columns missing from the header read from a padding column
+        # that is always empty
+        missing_col = len(header)
+        col = {
+            name: header.index(name) if name in header else missing_col
+            for name in _CSV_COLUMNS
+        }
+        width = missing_col + 1
+        i_icao24 = col['icao24']
+        i_registration = col['registration']
+        i_typecode = col['typecode']
+        i_model = col['model']
+        i_operator = col['operator']
+        i_operatoricao = col['operatoricao']
+        i_operatorcallsign = col['operatorcallsign']
 
         for row in reader:
-            icao24 = row.get('icao24', '').strip().lower()
+            if len(row) < width:
+                row += [''] * (width - len(row))
+
+            icao24 = row[i_icao24].strip().lower()
             if not icao24 or len(icao24) != 6:
                 continue
 
             record = {
                 'icao24': icao24,
-                'registration': row.get('registration', '').strip() or None,
-                'type_code': row.get('typecode', '').strip() or None,
-                'type_description': row.get('model', '').strip() or None,
-                'operator': row.get('operator', '').strip() or None,
-                'operator_icao': row.get('operatoricao', '').strip() or None,
-                'operator_callsign': row.get('operatorcallsign', '').strip() or None,
+                'registration': row[i_registration].strip() or None,
+                'type_code': row[i_typecode].strip() or None,
+                'type_description': row[i_model].strip() or None,
+                'operator': row[i_operator].strip() or None,
+                'operator_icao': row[i_operatoricao].strip() or None,
+                'operator_callsign': row[i_operatorcallsign].strip() or None,
             }
 
             batch.append(record)
@@ -316,20 +421,27 @@ def load_aircraft_csv(csv_path: Path, batch_size: int = 5000) -> int:
 
 
 def _insert_batch(records: list) -> None:
-    """Batch insert/upsert aircraft records."""
+    """Batch insert/upsert aircraft records (one executemany per batch)."""
     with SessionLocal() as session:
-        for record in records:
-            stmt = sqlite_insert(Aircraft).values(**record)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=['icao24'],
-                set_={
-                    'registration': stmt.excluded.registration,
-                    'type_code': stmt.excluded.type_code,
-                    'type_description': stmt.excluded.type_description,
-                    'operator': stmt.excluded.operator,
-                    'operator_icao': stmt.excluded.operator_icao,
-                    'operator_callsign': stmt.excluded.operator_callsign,
-                }
-            )
-            session.execute(stmt)
+        session.execute(_AIRCRAFT_UPSERT, records)
         session.commit()
+
+
+def _build_aircraft_upsert():
+    """INSERT ... ON CONFLICT (icao24) DO UPDATE for the aircraft table."""
+    stmt = sqlite_insert(Aircraft.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=['icao24'],
+        set_={
+            'registration': stmt.excluded.registration,
+            'type_code': stmt.excluded.type_code,
+            'type_description': stmt.excluded.type_description,
+            'operator': stmt.excluded.operator,
+            'operator_icao': stmt.excluded.operator_icao,
+            'operator_callsign': stmt.excluded.operator_callsign,
+        }
+    )
+
+
+# Compiled once; executed with a list of row dicts per batch
+_AIRCRAFT_UPSERT = _build_aircraft_upsert()
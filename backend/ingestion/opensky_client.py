@@ -28,19 +28,28 @@ OpenSky state vector format (array indices):
 """
 
 import logging
+import math
+import random
 import time
 from dataclasses import dataclass
 from typing import Optional, List, Tuple, Any
 
+import orjson
 import requests
 from requests.auth import HTTPBasicAuth
 
 from backend.config import config
+from backend.ratelimit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
+# Retry policy for transient failures (see OpenSkyClient._fetch)
+_MAX_RETRIES = 2
+_BACKOFF_BASE = 2.0  # seconds; doubles per attempt
+_MAX_RETRY_WAIT = 60.0  # longer retry-after hints are not waited out
 
-@dataclass
+
+@dataclass(slots=True)
 class BoundingBox:
     """
     Geographic bounding box for API queries.
@@ -90,11 +99,10 @@ class BoundingBox:
 
 def cos_deg(degrees: float) -> float:
     """Cosine of angle in degrees."""
-    import math
     return math.cos(math.radians(degrees))
 
 
-@dataclass
+@dataclass(slots=True)
 class StateVector:
     """
     Parsed state vector from OpenSky API.
@@ -130,8 +138,10 @@ class StateVector:
             return None
 
         icao24 = arr[0]
-        if not icao24 or not isinstance(icao24, str):
+        if type(icao24) is not str or not icao24:
             return None
+        if not icao24.islower():
+            icao24 = icao24.lower()  # Normalize to lowercase
 
         # Normalize callsign (strip whitespace, handle None)
         callsign = arr[1]
@@ -139,7 +149,7 @@ class StateVector:
             callsign = callsign.strip() or None
 
         return cls(
-            icao24=icao24.lower(),  # Normalize to lowercase
+            icao24=icao24,
             callsign=callsign,
             origin_country=arr[2],
             time_position=arr[3],
@@ -170,7 +180,7 @@ class OpenSkyClient:
     - GET requests to /states/all endpoint
     - Optional authentication for higher rate limits
     - Bounding box filtering
-    - Rate limiting (internal tracking)
+    - Rate limiting (adaptive token bucket) and retries
     """
 
     def __init__(
@@ -188,8 +198,8 @@ class OpenSkyClient:
             logger.warning('OpenSky client running without authentication (lower rate limits)')
 
         self.session = requests.Session()
-        self.last_request_time: float = 0
-        self._min_interval = 5.0 if self.auth else 10.0
+        # OpenSky allows ~1 request per 5s authenticated, 10s anonymous
+        self.bucket = TokenBucket(rate=1 / 5.0 if self.auth else 1 / 10.0)
 
     @classmethod
     def from_config(cls) -> 'OpenSkyClient':
@@ -200,19 +210,75 @@ class OpenSkyClient:
             base_url=config.opensky.base_url,
         )
 
-    def _wait_for_rate_limit(self) -> None:
+    @staticmethod
+    def _retry_after(response: requests.Response) -> Optional[float]:
+        """Seconds the server asked us to wait, if it said."""
+        value = (
+            response.headers.get('X-Rate-Limit-Retry-After-Seconds')
+            or response.headers.get('Retry-After')
+        )
+        try:
+            return float(value) if value is not None else None
+        except ValueError:
+            return None
+
+    def _fetch(self, url: str, params: dict) -> dict:
         """
-        Enforce minimum interval between requests.
+        GET a JSON document, retrying transient failures.
 
-        OpenSky rate limits:
-        - Anonymous: ~10 seconds between requests
-        - Authenticated: ~5 seconds between requests
+        Timeouts, connection errors and 5xx responses back off
+        exponentially with jitter. A 429 halves the request rate and
+        honours the server's retry-after hint when it is short; a long
+        hint (exhausted daily quota) is raised to the caller instead.
         """
-        elapsed = time.time() - self.last_request_time
-        if elapsed < self._min_interval:
-            sleep_time = self._min_interval - elapsed
-            logger.debug(f'Rate limiting: sleeping {sleep_time:.1f}s')
-            time.sleep(sleep_time)
+        self.bucket.acquire()
+        # Retries are paced by the backoff/retry-after wait, not the bucket
+        for attempt in range(_MAX_RETRIES + 1):
+            backoff = _BACKOFF_BASE * 2 ** attempt + random.uniform(0, _BACKOFF_BASE)
+            try:
+                response = self.session.get(
+                    url,
+                    params=params,
+                    auth=self.auth,
+                    timeout=30,
+                )
+                if response.status_code == 429:
+                    self.bucket.on_throttle()
+                    retry_after = self._retry_after(response)
+                    wait = backoff if retry_after is None else retry_after + random.uniform(0, 1)
+                    if attempt < _MAX_RETRIES and wait <= _MAX_RETRY_WAIT:
+                        logger.warning(f'OpenSky rate limit exceeded, retrying in {wait:.1f}s')
+                        time.sleep(wait)
+                        continue
+                    logger.warning('OpenSky rate limit exceeded')
+
+                response.raise_for_status()
+                data = orjson.loads(response.content)
+                self.bucket.on_success()
+                return data
+
+            except requests.exceptions.HTTPError as e:
+                status = e.response.status_code
+                if status >= 500 and attempt < _MAX_RETRIES:
+                    logger.warning(f'OpenSky API error: {status}, retrying in {backoff:.1f}s')
+                    time.sleep(backoff)
+                    continue
+                if status != 429:
+                    logger.error(f'OpenSky API error: {status}')
+                raise
+            except (requests.exceptions.Timeout, requests.exceptions.ConnectionError) as e:
+                if attempt < _MAX_RETRIES:
+                    logger.warning(f'OpenSky request failed ({e}), retrying in {backoff:.1f}s')
+                    time.sleep(backoff)
+                    continue
+                logger.error(f'OpenSky request failed: {e}')
+                raise
+            except requests.exceptions.RequestException as e:
+                logger.error(f'OpenSky request failed: {e}')
+                raise
+            except orjson.JSONDecodeError as e:
+                logger.error(f'OpenSky returned invalid JSON: {e}')
+                raise
 
     def get_states(
         self,
@@ -233,8 +299,6 @@ class OpenSkyClient:
         Raises:
             requests.RequestException on network/API errors
         """
-        self._wait_for_rate_limit()
-
         url = f'{self.base_url}/states/all'
         params = {}
 
@@ -247,30 +311,7 @@ class OpenSkyClient:
 
         logger.debug(f'Fetching states: {url} params={params}')
 
-        try:
-            response = self.session.get(
-                url,
-                params=params,
-                auth=self.auth,
-                timeout=30,
-            )
-            self.last_request_time = time.time()
-
-            response.raise_for_status()
-            data = response.json()
-
-        except requests.exceptions.Timeout:
-            logger.error('OpenSky API timeout')
-            raise
-        except requests.exceptions.HTTPError as e:
-            if e.response.status_code == 429:
-                logger.warning('OpenSky rate limit exceeded')
-            else:
-                logger.error(f'OpenSky API error: {e.response.status_code}')
-            raise
-        except requests.exceptions.RequestException as e:
-            logger.error(f'OpenSky request failed: {e}')
-            raise
+        data = self._fetch(url, params)
 
         # Parse response
         api_time = data.get('time', int(time.time()))
@@ -22,12 +22,15 @@ import time
 from datetime import datetime, timezone
 from typing import Optional, List, Tuple, Callable
 
-from sqlalchemy import delete, update
+import numpy as np
+from sqlalchemy import bindparam, delete, select, update
 from sqlalchemy.dialects.sqlite import insert as sqlite_insert
 
 from backend.config import config
-from backend.models import FlightState, PositionHistory, get_retention_cutoff_timestamp
-from backend.models.base import SessionLocal
+from backend.models import (
+    FlightState, PositionHistory, get_retention_cutoff_timestamp, optimize_db,
+)
+from backend.models.base import engine
 from backend.models.flight_state import FlightPhase
 from backend.ingestion.opensky_client import OpenSkyClient, StateVector
 
@@ -97,6 +100,116 @@ def detect_flight_phase(
         return FlightPhase.CRUISE
 
 
+def haversine_distances(
+    lat1: float, lon1: float,
+    lat2: np.ndarray, lon2: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized haversine_distance() from one point to arrays of points.
+
+    Returns distances in kilometers; NaN coordinates give NaN.
+    """
+    R = 6371.0  # Earth radius in km
+
+    # Observer terms are scalars, computed once per batch
+    lat1_rad = math.radians(lat1)
+    cos_lat1 = math.cos(lat1_rad)
+
+    lat2_rad = np.radians(lat2)
+    delta_lat = lat2_rad - lat1_rad
+    delta_lon = np.radians(lon2 - lon1)
+
+    a = (
+        np.sin(delta_lat / 2) ** 2 +
+        cos_lat1 * np.cos(lat2_rad) *
+        np.sin(delta_lon / 2) ** 2
+    )
+    c = 2 * np.arctan2(np.sqrt(a), np.sqrt(1 - a))
+
+    return R * c
+
+
+# Phase strings for each detect_flight_phases() condition, in order
+_PHASE_CHOICES = [
+    FlightPhase.GROUND.value,
+    FlightPhase.GROUND.value,
+    FlightPhase.UNKNOWN.value,
+    FlightPhase.CLIMB.value,
+    FlightPhase.DESCENT.value,
+]
+
+
+def detect_flight_phases(
+    on_ground: np.ndarray,
+    vertical_rate: np.ndarray,
+    baro_altitude: np.ndarray,
+) -> np.ndarray:
+    """
+    Vectorized detect_flight_phase() over telemetry arrays.
+
+    Missing vertical_rate/baro_altitude values are NaN. Returns an array
+    of FlightPhase values, applying the same rules in the same order.
+    """
+    no_rate = np.isnan(vertical_rate)
+    with np.errstate(invalid='ignore'):
+        conditions = [
+            on_ground,
+            (baro_altitude < 500) & (no_rate | (np.abs(vertical_rate) < 1.0)),
+            no_rate,
+            vertical_rate > 2.5,
+            vertical_rate < -2.5,
+        ]
+    return np.select(conditions, _PHASE_CHOICES, default=FlightPhase.CRUISE.value)
+
+
+def _build_flight_state_upsert():
+    """INSERT ... ON CONFLICT (icao24) DO UPDATE for the flight_states table."""
+    stmt = sqlite_insert(FlightState.__table__)
+    return stmt.on_conflict_do_update(
+        index_elements=['icao24'],
+        set_={
+            'callsign': stmt.excluded.callsign,
+            'origin_country': stmt.excluded.origin_country,
+            'latitude': stmt.excluded.latitude,
+            'longitude': stmt.excluded.longitude,
+            'baro_altitude': stmt.excluded.baro_altitude,
+            'geo_altitude': stmt.excluded.geo_altitude,
+            'velocity': stmt.excluded.velocity,
+            'true_track': stmt.excluded.true_track,
+            'vertical_rate': stmt.excluded.vertical_rate,
+            'on_ground': stmt.excluded.on_ground,
+            'squawk': stmt.excluded.squawk,
+            'spi': stmt.excluded.spi,
+            'position_source': stmt.excluded.position_source,
+            'time_position': stmt.excluded.time_position,
+            'last_contact': stmt.excluded.last_contact,
+            'flight_phase': stmt.excluded.flight_phase,
+            'distance_km': stmt.excluded.distance_km,
+            'updated_at': stmt.excluded.updated_at,
+        }
+    )
+
+
+# Compiled once; executed with a list of row dicts per cycle
+_FLIGHT_STATE_UPSERT = _build_flight_state_upsert()
+_POSITION_HISTORY_INSERT = PositionHistory.__table__.insert()
+
+# Max history rows deleted per cleanup transaction
+_HISTORY_DELETE_CHUNK = 10000
+
+# Retention cleanup, built once and bound with the cycle's cutoffs
+_STALE_STATES_DELETE = delete(FlightState).where(
+    FlightState.last_contact < bindparam('cutoff')
+)
+_EXPIRED_HISTORY_DELETE = delete(PositionHistory).where(
+    PositionHistory.id.in_(
+        select(PositionHistory.id)
+        .where(PositionHistory.timestamp < bindparam('cutoff'))
+        .limit(bindparam('chunk'))
+    )
+)
+
+
 class IngestionPipeline:
     """
     Manages the data ingestion lifecycle.
@@ -146,118 +259,105 @@ class IngestionPipeline:
         """
         self._on_update_callbacks.append(callback)
 
-    def _enrich_state(self, sv: StateVector) -> dict:
+    def _enrich_batch(
+        self,
+        states: List[StateVector],
+    ) -> Tuple[List[dict], List[Optional[float]]]:
         """
-        Enrich a state vector with computed fields.
+        Enrich state vectors with computed fields in one vectorized pass.
 
-        Returns a dict ready for database insertion.
+        Returns (dicts ready for database insertion, distance per state).
+        The distances are reused for the history records.
         """
+        def column(attr: str) -> np.ndarray:
+            # None -> NaN
+            return np.array([getattr(sv, attr) for sv in states], dtype=np.float64)
+
         # Compute distance from observer
-        distance_km = None
-        if self.observer_location and sv.latitude and sv.longitude:
-            distance_km = haversine_distance(
+        if self.observer_location:
+            distances = haversine_distances(
                 self.observer_location[0], self.observer_location[1],
-                sv.latitude, sv.longitude
+                column('latitude'), column('longitude'),
             )
+            distance_list = np.where(np.isnan(distances), None, distances).tolist()
+        else:
+            distance_list = [None] * len(states)
 
         # Detect flight phase
-        phase = detect_flight_phase(
-            sv.on_ground,
-            sv.vertical_rate,
-            sv.baro_altitude,
-        )
-
-        return {
-            'icao24': sv.icao24,
-            'callsign': sv.callsign,
-            'origin_country': sv.origin_country,
-            'latitude': sv.latitude,
-            'longitude': sv.longitude,
-            'baro_altitude': sv.baro_altitude,
-            'geo_altitude': sv.geo_altitude,
-            'velocity': sv.velocity,
-            'true_track': sv.true_track,
-            'vertical_rate': sv.vertical_rate,
-            'on_ground': sv.on_ground,
-            'squawk': sv.squawk,
-            'spi': sv.spi,
-            'position_source': sv.position_source,
-            'time_position': sv.time_position,
-            'last_contact': sv.last_contact,
-            'flight_phase': phase.value,
-            'distance_km': distance_km,
-            'updated_at': datetime.now(timezone.utc),
-        }
+        phases = detect_flight_phases(
+            np.array([sv.on_ground for sv in states], dtype=bool),
+            column('vertical_rate'),
+            column('baro_altitude'),
+        ).tolist()
+
+        # One timestamp for the whole snapshot; passing it explicitly also
+        # skips the models' per-row Python default callables
+        now = datetime.now(timezone.utc)
+        enriched = [
+            {
+                'icao24': sv.icao24,
+                'callsign': sv.callsign,
+                'origin_country': sv.origin_country,
+                'latitude': sv.latitude,
+                'longitude': sv.longitude,
+                'baro_altitude': sv.baro_altitude,
+                'geo_altitude': sv.geo_altitude,
+                'velocity': sv.velocity,
+                'true_track': sv.true_track,
+                'vertical_rate': sv.vertical_rate,
+                'on_ground': sv.on_ground,
+                'squawk': sv.squawk,
+                'spi': sv.spi,
+                'position_source': sv.position_source,
+                'time_position': sv.time_position,
+                'last_contact': sv.last_contact,
+                'flight_phase': phase,
+                'distance_km': distance_km,
+                'created_at': now,  # Only used on insert; upsert keeps the original
+                'updated_at': now,
+            }
+            for sv, phase, distance_km in zip(states, phases, distance_list)
+        ]
+        return enriched, distance_list
 
     def _batch_upsert_states(
         self,
         states: List[dict],
-        session,
+        conn,
     ) -> int:
         """
-        Batch upsert flight states using SQLite INSERT OR REPLACE.
+        Batch upsert flight states using SQLite INSERT ... ON CONFLICT.
 
         Returns count of rows affected.
         """
         if not states:
             return 0
 
-        # SQLite upsert using INSERT ... ON CONFLICT
-        for state in states:
-            stmt = sqlite_insert(FlightState).values(**state)
-            stmt = stmt.on_conflict_do_update(
-                index_elements=['icao24'],
-                set_={
-                    'callsign': stmt.excluded.callsign,
-                    'origin_country': stmt.excluded.origin_country,
-                    'latitude': stmt.excluded.latitude,
-                    'longitude': stmt.excluded.longitude,
-                    'baro_altitude': stmt.excluded.baro_altitude,
-                    'geo_altitude': stmt.excluded.geo_altitude,
-                    'velocity': stmt.excluded.velocity,
-                    'true_track': stmt.excluded.true_track,
-                    'vertical_rate': stmt.excluded.vertical_rate,
-                    'on_ground': stmt.excluded.on_ground,
-                    'squawk': stmt.excluded.squawk,
-                    'spi': stmt.excluded.spi,
-                    'position_source': stmt.excluded.position_source,
-                    'time_position': stmt.excluded.time_position,
-                    'last_contact': stmt.excluded.last_contact,
-                    'flight_phase': stmt.excluded.flight_phase,
-                    'distance_km': stmt.excluded.distance_km,
-                    'updated_at': stmt.excluded.updated_at,
-                }
-            )
-            session.execute(stmt)
+        # One INSERT ... ON CONFLICT statement, executed for every row
+        conn.execute(_FLIGHT_STATE_UPSERT, states)
 
         return len(states)
 
     def _batch_insert_history(
         self,
         states: List[StateVector],
+        distances: List[Optional[float]],
         api_time: int,
-        session,
+        conn,
     ) -> int:
         """
         Batch insert position history records.
 
         This is the append-only time-series pattern - we never update
-        historical records, only insert new ones.
+        historical records, only insert new ones. distances are the
+        per-state values computed by _enrich_batch().
         """
         if not states:
             return 0
 
-        # Compute distance for each state
-        records = []
-        for sv in states:
-            distance_km = None
-            if self.observer_location and sv.latitude and sv.longitude:
-                distance_km = haversine_distance(
-                    self.observer_location[0], self.observer_location[1],
-                    sv.latitude, sv.longitude
-                )
-
-            records.append({
+        created_at = datetime.now(timezone.utc)
+        records = [
+            {
                 'icao24': sv.icao24,
                 'callsign': sv.callsign,
                 'timestamp': sv.time_position or api_time,
@@ -271,41 +371,45 @@ class IngestionPipeline:
                 'on_ground': sv.on_ground,
                 'position_source': sv.position_source,
                 'distance_km': distance_km,
-            })
+                'created_at': created_at,
+            }
+            for sv, distance_km in zip(states, distances)
+        ]
 
         # Bulk insert
-        session.execute(
-            PositionHistory.__table__.insert(),
-            records
-        )
+        conn.execute(_POSITION_HISTORY_INSERT, records)
 
         return len(records)
 
-    def _cleanup_stale_data(self, session) -> Tuple[int, int]:
+    def _cleanup_stale_data(self) -> Tuple[int, int]:
         """
         Remove stale data per retention policy.
 
+        Runs in its own transactions after the ingest commit, deleting
+        history in chunks so one large purge never holds the write lock
+        for long.
+
         Returns (states_deleted, history_deleted).
         """
         now = datetime.now(timezone.utc)
 
         # Remove flight states not updated in stale_threshold_seconds
         stale_cutoff = now.timestamp() - config.ingestion.stale_threshold_seconds
-        states_result = session.execute(
-            delete(FlightState).where(
-                FlightState.last_contact < stale_cutoff
-            )
-        )
+        with engine.begin() as conn:
+            states_result = conn.execute(_STALE_STATES_DELETE, {'cutoff': stale_cutoff})
         states_deleted = states_result.rowcount
 
-        # Remove history older than retention period
+        # Remove history older than retention period, one chunk per
+        # transaction (ix_position_history_timestamp finds each chunk)
         history_cutoff = get_retention_cutoff_timestamp(config.retention.hours)
-        history_result = session.execute(
-            delete(PositionHistory).where(
-                PositionHistory.timestamp < history_cutoff
-            )
-        )
-        history_deleted = history_result.rowcount
+        params = {'cutoff': history_cutoff, 'chunk': _HISTORY_DELETE_CHUNK}
+        history_deleted = 0
+        while True:
+            with engine.begin() as conn:
+                deleted = conn.execute(_EXPIRED_HISTORY_DELETE, params).rowcount
+            history_deleted += deleted
+            if deleted < _HISTORY_DELETE_CHUNK:
+                break
 
         if states_deleted or history_deleted:
             logger.info(
@@ -340,22 +444,28 @@ class IngestionPipeline:
             self._last_fetch_time = time.time()
             self._fetch_count += 1
 
-            # Stage 2: Enrich and process in database transaction
-            with SessionLocal() as session:
-                # Enrich states with computed fields
-                enriched = [self._enrich_state(sv) for sv in states]
+            # Stage 2: Enrich states with computed fields
+            enriched, distances = self._enrich_batch(states)
 
+            # Stages 3-4 are plain Core writes, so they run on a bare
+            # connection in one transaction (no ORM session bookkeeping)
+            with engine.begin() as conn:
                 # Stage 3: Upsert current states
-                self._batch_upsert_states(enriched, session)
+                self._batch_upsert_states(enriched, conn)
 
                 # Stage 4: Append to history
-                self._batch_insert_history(states, api_time, session)
+                self._batch_insert_history(states, distances, api_time, conn)
 
-                # Stage 5: Cleanup (run periodically, not every cycle)
-                if self._fetch_count % 30 == 0:  # Every ~5 minutes at 10s interval
-                    self._cleanup_stale_data(session)
-
-                session.commit()
+            # Stage 5: Cleanup (run periodically, not every cycle). The
+            # ingest is already committed, so a failure here is only logged.
+            if self._fetch_count % 30 == 0:  # Every ~5 minutes at 10s interval
+                try:
+                    self._cleanup_stale_data()
+                    # Refresh planner stats every ~4 hours
+                    if self._fetch_count % 1440 == 0:
+                        optimize_db()
+                except Exception as e:
+                    logger.error(f'Cleanup error: {e}')
 
             logger.info(f'Processed {len(states)} aircraft')
 
@@ -385,8 +495,11 @@ class IngestionPipeline:
         logger.info(f'Starting continuous ingestion (interval={interval}s)')
 
         while self._running:
+            started = time.monotonic()
             self.fetch_and_process()
-            time.sleep(interval)
+            # Fixed cadence: network wait and processing count toward the
+            # interval instead of being added on top of it
+            time.sleep(max(0.0, interval - (time.monotonic() - started)))
 
         logger.info('Ingestion stopped')
 
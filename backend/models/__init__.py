@@ -8,7 +8,7 @@ Schema designed for time-series telemetry data with these priorities:
 4. Rolling window analytics support
 """
 
-from backend.models.base import Base, engine, SessionLocal, init_db, get_session
+from backend.models.base import Base, engine, SessionLocal, ScopedSession, init_db, optimize_db, get_session
 from backend.models.aircraft import Aircraft
 from backend.models.flight_state import FlightState
 from backend.models.position_history import PositionHistory, get_retention_cutoff_timestamp
@@ -17,7 +17,9 @@ __all__ = [
     'Base',
     'engine',
     'SessionLocal',
+    'ScopedSession',
     'init_db',
+    'optimize_db',
     'get_session',
     'Aircraft',
     'FlightState',
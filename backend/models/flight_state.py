@@ -11,11 +11,12 @@ Design notes:
 - Includes computed fields for display (flight phase, etc.)
 """
 
+import time
 from datetime import datetime, timezone
 from enum import Enum
 from typing import Optional
 
-from sqlalchemy import String, Float, Integer, DateTime, Boolean, Index, ForeignKey
+from sqlalchemy import String, Float, Integer, DateTime, Boolean, Index, ForeignKey, text
 from sqlalchemy.orm import Mapped, mapped_column, relationship
 
 from backend.models.base import Base
@@ -203,7 +204,6 @@ class FlightState(Base):
         DateTime,
         default=lambda: datetime.now(timezone.utc),
         onupdate=lambda: datetime.now(timezone.utc),
-        index=True,  # Index for cleanup queries
         comment='Last update timestamp'
     )
 
@@ -211,8 +211,17 @@ class FlightState(Base):
     __table_args__ = (
         # Spatial queries (find aircraft near a point)
         Index('ix_flight_states_location', 'latitude', 'longitude'),
-        # Active flights query
-        Index('ix_flight_states_active', 'on_ground', 'updated_at'),
+        # Active flights query (on_ground == False). Partial, so the index
+        # only changes when an aircraft takes off or lands, not on every
+        # upsert, and covers the icao24 lookup on its own.
+        Index(
+            'ix_flight_states_airborne', 'icao24',
+            sqlite_where=text('on_ground = 0'),
+            postgresql_where=text('NOT on_ground'),
+        ),
+        # One small row per aircraft, always found by icao24: store rows
+        # in the primary key b-tree instead of behind a separate rowid
+        {'sqlite_with_rowid': False},
     )
 
     def __repr__(self) -> str:
@@ -268,4 +277,4 @@ class FlightState(Base):
         """Check if data is stale (no update in 60+ seconds)."""
         if self.last_contact is None:
             return True
-        return (datetime.now(timezone.utc).timestamp() - self.last_contact) > 60
+        return (time.time() - self.last_contact) > 60
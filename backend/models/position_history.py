@@ -48,10 +48,10 @@ class PositionHistory(Base):
     )
 
     # Aircraft identifier - not a foreign key to avoid insert overhead
+    # (lookups use ix_position_history_icao_time, which leads with icao24)
     icao24: Mapped[str] = mapped_column(
         String(6),
         nullable=False,
-        index=True,
         comment='ICAO24 hex address'
     )
 
@@ -137,31 +137,21 @@ class PositionHistory(Base):
         comment='Distance from observer in km'
     )
 
-    # Record creation time (for cleanup queries)
+    # Record creation time (retention cleanup goes by timestamp)
     created_at: Mapped[datetime] = mapped_column(
         DateTime,
         default=lambda: datetime.now(timezone.utc),
-        index=True,
         comment='Record creation time'
     )
 
     # Indexes optimized for time-series query patterns
     __table_args__ = (
         # Primary analytical query: get history for one aircraft in time range
-        # This composite index is critical for rolling window calculations
+        # This composite index is critical for rolling window calculations and
+        # serves /history as a range scan already in timestamp order (no sort)
         Index(
             'ix_position_history_icao_time',
             'icao24', 'timestamp',
-            # Descending timestamp for "most recent N" queries
-        ),
-
-        # Cleanup query: find old records to delete
-        Index('ix_position_history_cleanup', 'created_at'),
-
-        # Spatial + time query: aircraft near a point in time window
-        Index(
-            'ix_position_history_spatial_time',
-            'latitude', 'longitude', 'timestamp'
         ),
     )
 
@@ -0,0 +1,55 @@
+"""
+Client-side rate limiting for external APIs.
+
+Shared by the OpenSky client and the AviationStack route service; each
+keeps its own bucket sized to its provider's limits.
+"""
+
+import logging
+import threading
+import time
+
+logger = logging.getLogger(__name__)
+
+
+class TokenBucket:
+    """
+    Token bucket rate limiter with AIMD rate adaptation.
+
+    Each request takes one token; tokens refill at `rate` per second up
+    to `capacity`. The rate creeps back up on success and halves when
+    the server throttles us, bounded by [rate_max / 8, rate_max].
+    """
+
+    def __init__(self, rate: float, capacity: float = 1.0):
+        self.rate_max = rate
+        self.rate_min = rate / 8
+        self.rate = rate
+        self.capacity = capacity
+        self.tokens = capacity
+        self.last_refill = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self) -> None:
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.last_refill) * self.rate)
+        self.last_refill = now
+
+    def acquire(self) -> None:
+        """Block until a token is available, then take it."""
+        with self._lock:
+            self._refill()
+            if self.tokens < 1:
+                wait = (1 - self.tokens) / self.rate
+                logger.debug(f'Rate limiting: sleeping {wait:.1f}s')
+                time.sleep(wait)
+                self._refill()
+            self.tokens -= 1
+
+    def on_success(self) -> None:
+        """Additive increase back toward the nominal rate."""
+        self.rate = min(self.rate_max, self.rate + self.rate_max / 10)
+
+    def on_throttle(self) -> None:
+        """Multiplicative decrease after a 429."""
+        self.rate = max(self.rate_min, self.rate / 2)
@@ -0,0 +1,25 @@
+"""
+Process-wide runtime state shared by the app factory and API handlers.
+
+create_app() sets these once at startup; handlers read them as module
+attributes (runtime.pipeline), so import the module rather than the names.
+"""
+
+from typing import Optional, Tuple, TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from backend.ingestion import IngestionPipeline
+
+# Background ingestion pipeline, or None if ingestion is not running
+pipeline: Optional['IngestionPipeline'] = None
+
+# Observer (lat, lon) used for radius filtering and distances
+observer_location: Optional[Tuple[float, float]] = None
+
+
+def set_observer_location(lat: float, lon: float) -> None:
+    """Move the observer and point the running pipeline at it."""
+    global observer_location
+    observer_location = (lat, lon)
+    if pipeline:
+        pipeline.set_observer_location(lat, lon)
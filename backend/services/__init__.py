@@ -6,5 +6,12 @@ graceful degradation when services are unavailable.
 """
 
 from backend.services.flight_info import FlightInfoService, FlightRouteInfo, flight_info_service
+from backend.services.geolocation import IPLocation, get_ip_location
 
-__all__ = ['FlightInfoService', 'FlightRouteInfo', 'flight_info_service']
+__all__ = [
+    'FlightInfoService',
+    'FlightRouteInfo',
+    'flight_info_service',
+    'IPLocation',
+    'get_ip_location',
+]
@@ -6,28 +6,101 @@ Integrates with external APIs to get:
 - Flight schedules
 - Estimated arrival times
 
-Uses caching to minimize API calls and respect rate limits.
+Uses caching to minimize API calls and respect rate limits. Lookups are
+saved to disk so a restart doesn't spend quota on them again.
 """
 
 import logging
 import os
-import random
+import tempfile
 import time
+from collections import OrderedDict
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
-from typing import Optional, Dict, Tuple
+from pathlib import Path
+from types import MappingProxyType
+from typing import Optional, Dict, Iterable, List, Tuple
 import threading
+import zlib
 
+import orjson
 import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 
 from backend.config import config
+from backend.ratelimit import TokenBucket
 
 logger = logging.getLogger(__name__)
 
-
-@dataclass
+# Route lookups persisted across restarts (real API results only)
+_ROUTE_CACHE_PATH = Path.home() / '.cache' / 'flightwall' / 'routes.json'
+
+# Returned by FlightInfoService._get_cached for a cached "no route found"
+_NO_ROUTE = object()
+
+# Airline ICAO callsign prefix -> IATA flight number prefix
+_ICAO_TO_IATA = MappingProxyType({
+    'AAL': 'AA',  # American Airlines
+    'DAL': 'DL',  # Delta
+    'UAL': 'UA',  # United
+    'SWA': 'WN',  # Southwest
+    'JBU': 'B6',  # JetBlue
+    'ASA': 'AS',  # Alaska
+    'FFT': 'F9',  # Frontier
+    'NKS': 'NK',  # Spirit
+    'ACA': 'AC',  # Air Canada
+    'WJA': 'WS',  # WestJet
+    'BAW': 'BA',  # British Airways
+    'DLH': 'LH',  # Lufthansa
+    'AFR': 'AF',  # Air France
+    'KLM': 'KL',  # KLM
+    'UAE': 'EK',  # Emirates
+    'QFA': 'QF',  # Qantas
+    'ANA': 'NH',  # All Nippon
+    'JAL': 'JL',  # Japan Airlines
+    'CPA': 'CX',  # Cathay Pacific
+    'SIA': 'SQ',  # Singapore
+    'SKW': 'OO',  # SkyWest
+    'RPA': 'YX',  # Republic
+    'ENY': 'MQ',  # Envoy
+    'FDX': 'FX',  # FedEx
+    'UPS': '5X',  # UPS
+})
+
+# (IATA, ICAO, name) airports used for demo routes
+_DEMO_AIRPORTS = (
+    ('JFK', 'KJFK', 'John F Kennedy Intl'),
+    ('LAX', 'KLAX', 'Los Angeles Intl'),
+    ('ORD', 'KORD', "Chicago O'Hare Intl"),
+    ('DFW', 'KDFW', 'Dallas Fort Worth Intl'),
+    ('DEN', 'KDEN', 'Denver Intl'),
+    ('ATL', 'KATL', 'Hartsfield-Jackson Atlanta Intl'),
+    ('SFO', 'KSFO', 'San Francisco Intl'),
+    ('SEA', 'KSEA', 'Seattle-Tacoma Intl'),
+    ('BOS', 'KBOS', 'Boston Logan Intl'),
+    ('MIA', 'KMIA', 'Miami Intl'),
+    ('YYZ', 'CYYZ', 'Toronto Pearson Intl'),
+    ('YUL', 'CYUL', 'Montreal Trudeau Intl'),
+    ('YVR', 'CYVR', 'Vancouver Intl'),
+    ('LHR', 'EGLL', 'London Heathrow'),
+    ('CDG', 'LFPG', 'Paris Charles de Gaulle'),
+)
+
+# Airline names for demo routes, by ICAO callsign prefix
+_DEMO_AIRLINE_NAMES = MappingProxyType({
+    'AAL': 'American Airlines', 'DAL': 'Delta Air Lines', 'UAL': 'United Airlines',
+    'SWA': 'Southwest Airlines', 'JBU': 'JetBlue Airways', 'ASA': 'Alaska Airlines',
+    'ACA': 'Air Canada', 'WJA': 'WestJet', 'BAW': 'British Airways',
+    'AFR': 'Air France', 'DLH': 'Lufthansa', 'SKW': 'SkyWest Airlines',
+    'RPA': 'Republic Airways', 'ENY': 'Envoy Air', 'EDV': 'Endeavor Air',
+    'FDX': 'FedEx Express', 'UPS': 'UPS Airlines',
+})
+
+
+@dataclass(slots=True, frozen=True)
 class FlightRouteInfo:
-    """Route information for a flight."""
+    """Route information for a flight; shared by cache entries, so immutable."""
     flight_number: str
     airline_name: Optional[str] = None
     airline_iata: Optional[str] = None
@@ -60,14 +133,34 @@ class FlightInfoService:
         self.api_key = api_key or config.aviationstack.api_key
         self.base_url = 'http://api.aviationstack.com/v1'
 
-        # Cache: callsign -> (FlightRouteInfo, timestamp)
-        self._cache: Dict[str, Tuple[Optional[FlightRouteInfo], float]] = {}
+        # Cache: callsign -> (FlightRouteInfo, monotonic timestamp); None
+        # records a lookup that found no route, kept for a shorter TTL.
+        # LRU order: most recently used entries at the end
+        self._cache: OrderedDict[str, Tuple[Optional[FlightRouteInfo], float]] = OrderedDict()
+        self._cache_size = 500
         self._cache_ttl = 3600  # 1 hour cache
-        self._lock = threading.RLock()
-
-        # Rate limiting
-        self._last_request_time = 0
-        self._min_request_interval = 2.0  # seconds between requests
+        self._negative_cache_ttl = 600  # 10 minutes for "no route found"
+        self._lock = threading.Lock()  # No method re-enters it
+        # Callsigns with an API lookup in progress; later callers wait on
+        # the Event instead of spending another request on the same flight
+        self._inflight: Dict[str, threading.Event] = {}
+
+        # Keep-alive connection pool; transient gateway errors are retried
+        # with backoff, but not 429s, which would only burn daily quota
+        self._session = requests.Session()
+        self._session.mount('http://', HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=4,
+            max_retries=Retry(
+                total=2,
+                backoff_factor=0.3,
+                status_forcelist=(502, 503, 504),
+                raise_on_status=False,
+            ),
+        ))
+
+        # Rate limiting: one request per 2s, shared by all request threads
+        self._bucket = TokenBucket(rate=1 / 2.0)
 
         # Track API usage
         self._requests_today = 0
@@ -81,6 +174,8 @@ class FlightInfoService:
 
         if self.demo_mode:
             logger.info('Route service running in DEMO MODE with mock data')
+        elif self.api_key:
+            self._load_persisted()
 
     def get_cached_route(self, callsign: str) -> Optional[FlightRouteInfo]:
         """
@@ -92,50 +187,60 @@ class FlightInfoService:
         if not callsign:
             return None
         callsign = callsign.strip().upper()
-        return self._get_cached(callsign)
+        cached = self._get_cached(callsign)
+        return None if cached is _NO_ROUTE else cached
+
+    def get_cached_routes(self, callsigns: List[Optional[str]]) -> Dict[str, FlightRouteInfo]:
+        """
+        Get cached route info for many callsigns at once (no API calls).
+
+        Takes the cache lock once for the whole batch instead of once per
+        flight. Returns a dict keyed by the callsigns as passed in,
+        containing only those with an unexpired cached route.
+        """
+        keys = {c: c.strip().upper() for c in callsigns if c}
+        cached = self._get_cached_many(keys.values())
+        return {
+            callsign: cached[key]
+            for callsign, key in keys.items()
+            if cached.get(key, _NO_ROUTE) is not _NO_ROUTE
+        }
+
+    def get_routes_info(self, callsigns: Iterable[Optional[str]]) -> Dict[str, Optional[FlightRouteInfo]]:
+        """
+        Get route information for many callsigns at once.
+
+        Cache hits (and remembered misses) are resolved under a single
+        lock; each distinct remaining callsign then goes through
+        get_route_info once, however often it appears. Returns a dict
+        keyed by the callsigns as passed in.
+        """
+        keys = {c: c.strip().upper() for c in callsigns if c}
+        cached = self._get_cached_many(keys.values())
+
+        for key in set(keys.values()) - cached.keys():
+            cached[key] = self.get_route_info(key)
+
+        return {
+            callsign: None if cached[key] is _NO_ROUTE else cached[key]
+            for callsign, key in keys.items()
+        }
 
     def _generate_mock_route(self, callsign: str) -> Optional[FlightRouteInfo]:
         """Generate realistic mock route data for demo purposes."""
-        # Common North American airports for realistic demo
-        airports = [
-            ('JFK', 'KJFK', 'John F Kennedy Intl'),
-            ('LAX', 'KLAX', 'Los Angeles Intl'),
-            ('ORD', 'KORD', "Chicago O'Hare Intl"),
-            ('DFW', 'KDFW', 'Dallas Fort Worth Intl'),
-            ('DEN', 'KDEN', 'Denver Intl'),
-            ('ATL', 'KATL', 'Hartsfield-Jackson Atlanta Intl'),
-            ('SFO', 'KSFO', 'San Francisco Intl'),
-            ('SEA', 'KSEA', 'Seattle-Tacoma Intl'),
-            ('BOS', 'KBOS', 'Boston Logan Intl'),
-            ('MIA', 'KMIA', 'Miami Intl'),
-            ('YYZ', 'CYYZ', 'Toronto Pearson Intl'),
-            ('YUL', 'CYUL', 'Montreal Trudeau Intl'),
-            ('YVR', 'CYVR', 'Vancouver Intl'),
-            ('LHR', 'EGLL', 'London Heathrow'),
-            ('CDG', 'LFPG', 'Paris Charles de Gaulle'),
-        ]
-
-        # Use callsign hash for consistent random selection
-        seed = hash(callsign) % 1000
-        random.seed(seed)
-
-        origin = random.choice(airports)
-        dest = random.choice([a for a in airports if a != origin])
+        # Hash-indexed choice: stable across runs (unlike hash()) and
+        # leaves the global random state alone
+        h = zlib.crc32(callsign.encode())
+        n = len(_DEMO_AIRPORTS)
+        origin_idx = h % n
+        origin = _DEMO_AIRPORTS[origin_idx]
+        dest = _DEMO_AIRPORTS[(origin_idx + 1 + (h >> 16) % (n - 1)) % n]
 
         # Extract airline from callsign
         airline_icao = callsign[:3] if len(callsign) >= 3 else 'UNK'
-        airline_names = {
-            'AAL': 'American Airlines', 'DAL': 'Delta Air Lines', 'UAL': 'United Airlines',
-            'SWA': 'Southwest Airlines', 'JBU': 'JetBlue Airways', 'ASA': 'Alaska Airlines',
-            'ACA': 'Air Canada', 'WJA': 'WestJet', 'BAW': 'British Airways',
-            'AFR': 'Air France', 'DLH': 'Lufthansa', 'SKW': 'SkyWest Airlines',
-            'RPA': 'Republic Airways', 'ENY': 'Envoy Air', 'EDV': 'Endeavor Air',
-            'FDX': 'FedEx Express', 'UPS': 'UPS Airlines',
-        }
-
         return FlightRouteInfo(
             flight_number=callsign,
-            airline_name=airline_names.get(airline_icao, 'Demo Airline'),
+            airline_name=_DEMO_AIRLINE_NAMES.get(airline_icao, 'Demo Airline'),
             airline_icao=airline_icao,
             origin_iata=origin[0],
             origin_icao=origin[1],
@@ -162,8 +267,10 @@ class FlightInfoService:
 
         callsign = callsign.strip().upper()
 
-        # Check cache first
+        # Check cache first (including remembered misses)
         cached = self._get_cached(callsign)
+        if cached is _NO_ROUTE:
+            return None
         if cached is not None:
             logger.debug(f'Route cache hit for {callsign}: {cached}')
             return cached
@@ -185,49 +292,172 @@ class FlightInfoService:
             logger.warning('Daily API limit reached, skipping lookup')
             return None
 
-        # Fetch from API
-        logger.info(f'Fetching route info from AviationStack for {callsign}')
-        route_info = self._fetch_from_api(callsign)
+        return self._fetch_coalesced(callsign)
+
+    def invalidate(self, callsign: str) -> None:
+        """Drop any cached route (or remembered miss) for a callsign."""
+        if not callsign:
+            return
+        callsign = callsign.strip().upper()
+        with self._lock:
+            self._cache.pop(callsign, None)
 
-        if route_info:
-            logger.info(f'Got route for {callsign}: {route_info.origin_iata} -> {route_info.destination_iata}')
-        else:
-            logger.info(f'No route data found for {callsign}')
+    def _fetch_coalesced(self, callsign: str) -> Optional[FlightRouteInfo]:
+        """
+        Fetch and cache a route, sharing one API call between callers.
+
+        If another thread is already looking up the same callsign, wait
+        for it and read its result from the cache. The cache is checked
+        again under the lock, since a fetch may have finished after the
+        caller's own cache check.
+        """
+        now = time.monotonic()
+        with self._lock:
+            entry = self._cache.get(callsign)
+            if entry is not None and now - entry[1] < self._ttl_for(entry[0]):
+                self._cache.move_to_end(callsign)
+                return entry[0]  # None for a remembered miss
+            pending = self._inflight.get(callsign)
+            if pending is None:
+                self._inflight[callsign] = done = threading.Event()
+
+        if pending is not None:
+            pending.wait(timeout=15)
+            cached = self._get_cached(callsign)
+            return None if cached is _NO_ROUTE else cached
 
-        # Cache result (even if None, to avoid repeated failed lookups)
-        self._set_cached(callsign, route_info)
+        try:
+            logger.info(f'Fetching route info from AviationStack for {callsign}')
+            route_info = self._fetch_from_api(callsign)
+
+            if route_info:
+                logger.info(f'Got route for {callsign}: {route_info.origin_iata} -> {route_info.destination_iata}')
+            else:
+                logger.info(f'No route data found for {callsign}')
+
+            # Cache result (even if None, to avoid repeated failed lookups)
+            self._set_cached(callsign, route_info)
+            self._persist()
+        finally:
+            with self._lock:
+                del self._inflight[callsign]
+            done.set()
 
         return route_info
 
-    def _get_cached(self, callsign: str) -> Optional[FlightRouteInfo]:
-        """Get cached route info if not expired."""
+    def _ttl_for(self, info: Optional[FlightRouteInfo]) -> float:
+        """Cache lifetime for an entry; misses expire sooner."""
+        return self._cache_ttl if info is not None else self._negative_cache_ttl
+
+    def _get_cached(self, callsign: str):
+        """
+        Get cached route info if not expired. callsign must already be
+        normalized (stripped, upper case).
+
+        Returns the FlightRouteInfo, _NO_ROUTE for a cached miss, or None
+        if there is no usable cache entry.
+        """
+        now = time.monotonic()
         with self._lock:
-            if callsign in self._cache:
-                info, timestamp = self._cache[callsign]
-                if time.time() - timestamp < self._cache_ttl:
-                    return info
-                else:
+            entry = self._cache.get(callsign)
+            if entry is None:
+                return None  # Not in cache
+            info, timestamp = entry
+            if now - timestamp >= self._ttl_for(info):
+                del self._cache[callsign]
+                return None  # Expired
+            self._cache.move_to_end(callsign)
+        return _NO_ROUTE if info is None else info
+
+    def _get_cached_many(self, callsigns: Iterable[str]) -> dict:
+        """
+        Batch form of _get_cached for already-normalized callsigns.
+
+        Returns a dict holding the FlightRouteInfo, or _NO_ROUTE for a
+        cached miss, for each callsign with a usable cache entry.
+        """
+        now = time.monotonic()
+        found = {}
+
+        with self._lock:
+            for callsign in callsigns:
+                entry = self._cache.get(callsign)
+                if entry is None:
+                    continue
+                info, timestamp = entry
+                if now - timestamp >= self._ttl_for(info):
                     del self._cache[callsign]
-        return None  # Not in cache or expired
+                    continue
+                self._cache.move_to_end(callsign)
+                found[callsign] = _NO_ROUTE if info is None else info
+
+        return found
 
     def _set_cached(self, callsign: str, info: Optional[FlightRouteInfo]) -> None:
-        """Cache route info."""
+        """Cache route info under an already-normalized callsign."""
+        entry = (info, time.monotonic())
         with self._lock:
-            self._cache[callsign] = (info, time.time())
+            self._cache[callsign] = entry
+            self._cache.move_to_end(callsign)
 
-            # Limit cache size
-            if len(self._cache) > 500:
-                # Remove oldest entries
-                sorted_items = sorted(self._cache.items(), key=lambda x: x[1][1])
-                for key, _ in sorted_items[:100]:
-                    del self._cache[key]
+            # Evict least recently used entries
+            while len(self._cache) > self._cache_size:
+                self._cache.popitem(last=False)
+
+    def _load_persisted(self) -> None:
+        """Restore unexpired lookups saved by a previous run."""
+        try:
+            with open(_ROUTE_CACHE_PATH, 'rb') as f:
+                saved = dict(orjson.loads(f.read()))
+        except (OSError, TypeError, ValueError):
+            return  # Missing or unreadable; start cold
+
+        # Saved times are wall clock; the cache runs on monotonic time
+        offset = time.time() - time.monotonic()
+        now = time.monotonic()
+        entries = []
+        for callsign, entry in saved.items():
+            try:
+                data, fetched_at = entry
+                info = None
+                if data is not None:
+                    data['scheduled_departure'] = self._parse_datetime(data.get('scheduled_departure'))
+                    data['scheduled_arrival'] = self._parse_datetime(data.get('scheduled_arrival'))
+                    info = FlightRouteInfo(**data)
+                timestamp = fetched_at - offset
+            except (AttributeError, TypeError, ValueError):
+                continue  # From an older format
+            if 0 <= now - timestamp < self._ttl_for(info):
+                entries.append((timestamp, callsign, info))
+
+        # Oldest first, so the LRU order follows fetch order
+        entries.sort(key=lambda e: e[0])
+        with self._lock:
+            for timestamp, callsign, info in entries[-self._cache_size:]:
+                self._cache[callsign] = (info, timestamp)
+
+        logger.info(f'Restored {len(entries)} cached route lookups')
+
+    def _persist(self) -> None:
+        """Save the cache to disk; failures only cost quota after a restart."""
+        offset = time.time() - time.monotonic()
+        with self._lock:
+            entries = list(self._cache.items())
+        saved = {callsign: (info, timestamp + offset) for callsign, (info, timestamp) in entries}
+
+        try:
+            _ROUTE_CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+            fd, tmp_path = tempfile.mkstemp(dir=_ROUTE_CACHE_PATH.parent)
+            with os.fdopen(fd, 'wb') as f:
+                f.write(orjson.dumps(saved))
+            os.replace(tmp_path, _ROUTE_CACHE_PATH)  # Readers never see a partial file
+        except OSError as e:
+            logger.debug(f'Could not write route cache: {e}')
 
     def _fetch_from_api(self, callsign: str) -> Optional[FlightRouteInfo]:
         """Fetch flight info from AviationStack API."""
         # Respect rate limiting
-        elapsed = time.time() - self._last_request_time
-        if elapsed < self._min_request_interval:
-            time.sleep(self._min_request_interval - elapsed)
+        self._bucket.acquire()
 
         try:
             # Extract flight number from callsign
@@ -241,19 +471,18 @@ class FlightInfoService:
 
             logger.debug(f'Fetching flight info for {flight_iata}')
 
-            response = requests.get(
+            response = self._session.get(
                 f'{self.base_url}/flights',
                 params=params,
                 timeout=10
             )
-            self._last_request_time = time.time()
             self._requests_today += 1
 
             if response.status_code != 200:
                 logger.warning(f'AviationStack API error: {response.status_code}')
                 return None
 
-            data = response.json()
+            data = orjson.loads(response.content)
 
             if 'error' in data:
                 logger.warning(f'AviationStack API error: {data["error"]}')
@@ -264,30 +493,31 @@ class FlightInfoService:
                 logger.debug(f'No flight data found for {callsign}')
                 return None
 
-            # Use first matching flight
+            # Use first matching flight. Sections can be null (aircraft
+            # often is for scheduled flights), hence `or {}` over a default
             flight = flights[0]
+            airline = flight.get('airline') or {}
+            departure = flight.get('departure') or {}
+            arrival = flight.get('arrival') or {}
+            aircraft = flight.get('aircraft') or {}
 
             return FlightRouteInfo(
                 flight_number=flight_iata,
-                airline_name=flight.get('airline', {}).get('name'),
-                airline_iata=flight.get('airline', {}).get('iata'),
-                airline_icao=flight.get('airline', {}).get('icao'),
-                origin_iata=flight.get('departure', {}).get('iata'),
-                origin_icao=flight.get('departure', {}).get('icao'),
-                origin_name=flight.get('departure', {}).get('airport'),
-                destination_iata=flight.get('arrival', {}).get('iata'),
-                destination_icao=flight.get('arrival', {}).get('icao'),
-                destination_name=flight.get('arrival', {}).get('airport'),
-                scheduled_departure=self._parse_datetime(
-                    flight.get('departure', {}).get('scheduled')
-                ),
-                scheduled_arrival=self._parse_datetime(
-                    flight.get('arrival', {}).get('scheduled')
-                ),
+                airline_name=airline.get('name'),
+                airline_iata=airline.get('iata'),
+                airline_icao=airline.get('icao'),
+                origin_iata=departure.get('iata'),
+                origin_icao=departure.get('icao'),
+                origin_name=departure.get('airport'),
+                destination_iata=arrival.get('iata'),
+                destination_icao=arrival.get('icao'),
+                destination_name=arrival.get('airport'),
+                scheduled_departure=self._parse_datetime(departure.get('scheduled')),
+                scheduled_arrival=self._parse_datetime(arrival.get('scheduled')),
                 status=flight.get('flight_status'),
-                aircraft_iata=flight.get('aircraft', {}).get('iata'),
-                aircraft_icao=flight.get('aircraft', {}).get('icao'),
-                aircraft_registration=flight.get('aircraft', {}).get('registration'),
+                aircraft_iata=aircraft.get('iata'),
+                aircraft_icao=aircraft.get('icao'),
+                aircraft_registration=aircraft.get('registration'),
             )
 
         except requests.RequestException as e:
@@ -306,39 +536,10 @@ class FlightInfoService:
         - DAL1234 -> DL1234
         - UAL567 -> UA567
         """
-        # Common ICAO to IATA mappings
-        icao_to_iata = {
-            'AAL': 'AA',  # American Airlines
-            'DAL': 'DL',  # Delta
-            'UAL': 'UA',  # United
-            'SWA': 'WN',  # Southwest
-            'JBU': 'B6',  # JetBlue
-            'ASA': 'AS',  # Alaska
-            'FFT': 'F9',  # Frontier
-            'NKS': 'NK',  # Spirit
-            'ACA': 'AC',  # Air Canada
-            'WJA': 'WS',  # WestJet
-            'BAW': 'BA',  # British Airways
-            'DLH': 'LH',  # Lufthansa
-            'AFR': 'AF',  # Air France
-            'KLM': 'KL',  # KLM
-            'UAE': 'EK',  # Emirates
-            'QFA': 'QF',  # Qantas
-            'ANA': 'NH',  # All Nippon
-            'JAL': 'JL',  # Japan Airlines
-            'CPA': 'CX',  # Cathay Pacific
-            'SIA': 'SQ',  # Singapore
-            'SKW': 'OO',  # SkyWest
-            'RPA': 'YX',  # Republic
-            'ENY': 'MQ',  # Envoy
-            'FDX': 'FX',  # FedEx
-            'UPS': '5X',  # UPS
-        }
-
         if len(callsign) >= 3:
             prefix = callsign[:3]
-            if prefix in icao_to_iata:
-                return icao_to_iata[prefix] + callsign[3:]
+            if prefix in _ICAO_TO_IATA:
+                return _ICAO_TO_IATA[prefix] + callsign[3:]
 
         # If no mapping found, return as-is
         return callsign
@@ -381,13 +582,12 @@ class FlightInfoService:
 
     @property
     def stats(self) -> dict:
-        """Get service statistics."""
-        with self._lock:
-            return {
-                'cache_size': len(self._cache),
-                'requests_today': self._requests_today,
-                'api_configured': bool(self.api_key),
-            }
+        """Get service statistics (a point-in-time read; no lock needed)."""
+        return {
+            'cache_size': len(self._cache),
+            'requests_today': self._requests_today,
+            'api_configured': bool(self.api_key),
+        }
 
 
 # Singleton instance
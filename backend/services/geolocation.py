@@ -0,0 +1,79 @@
+"""
+IP geolocation for observer location auto-detection.
+
+geocoder.ip('me') is a blocking HTTP round trip (~0.2-2s), so the result
+is cached on disk and reused across app restarts for a day.
+"""
+
+import json
+import logging
+import time
+from dataclasses import asdict, dataclass
+from pathlib import Path
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+_CACHE_PATH = Path.home() / '.cache' / 'flightwall' / 'geo.json'
+_CACHE_TTL = 24 * 3600  # 1 day
+
+
+@dataclass
+class IPLocation:
+    """Approximate location of this machine's public IP."""
+    latitude: float
+    longitude: float
+    city: Optional[str] = None
+    region: Optional[str] = None
+    country: Optional[str] = None
+
+
+def get_ip_location() -> Optional[IPLocation]:
+    """
+    Get the approximate location of this machine from its public IP.
+
+    Returns the cached result if it is less than a day old, otherwise
+    asks geocoder and caches the answer. Returns None if the lookup
+    fails; raises ImportError if geocoder is not installed.
+    """
+    cached = _read_cache()
+    if cached is not None:
+        return cached
+
+    import geocoder  # Optional dependency, only needed on a cache miss
+    g = geocoder.ip('me')
+    if not g.ok or not g.latlng:
+        return None
+
+    lat, lon = g.latlng
+    location = IPLocation(
+        latitude=lat,
+        longitude=lon,
+        city=g.city,
+        region=g.state,
+        country=g.country,
+    )
+    _write_cache(location)
+    return location
+
+
+def _read_cache() -> Optional[IPLocation]:
+    """Load the cached location if present and not expired."""
+    try:
+        with open(_CACHE_PATH) as f:
+            data = json.load(f)
+        if time.time() - data.pop('fetched_at') >= _CACHE_TTL:
+            return None
+        return IPLocation(**data)
+    except (OSError, ValueError, KeyError, TypeError):
+        return None  # Missing, unreadable or from an older format
+
+
+def _write_cache(location: IPLocation) -> None:
+    """Persist a location lookup; failures only cost the next lookup."""
+    try:
+        _CACHE_PATH.parent.mkdir(parents=True, exist_ok=True)
+        with open(_CACHE_PATH, 'w') as f:
+            json.dump({**asdict(location), 'fetched_at': time.time()}, f)
+    except OSError as e:
+        logger.debug(f'Could not write location cache: {e}')
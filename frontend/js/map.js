@@ -212,7 +212,7 @@ async function fetchFlights() {
         // Update status bar with connection info
         updateStatus('connected', 'Connected');
         document.getElementById('lastUpdate').textContent = `Last update: ${new Date().toLocaleTimeString()}`;
-        document.getElementById('queryTime').textContent = `Query: ${data.query_time_ms} ms`;
+        document.getElementById('queryTime').textContent = `Query: ${data.query_time_ms ?? '--'} ms`;
 
         // Update the map and UI with fresh data
         updateAircraftMarkers(data.flights);